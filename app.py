@@ -8,6 +8,18 @@ from datetime import datetime, timedelta
 import altair as alt
 import time
 
+import os
+
+from data import DataLoader, load_dataset
+from data.data_loader import resolve_source
+from data.schema import DIMENSIONS
+from utils.data_processing import dashboard_data, filter_dataframe, get_time_series_data
+from utils.cache import ResultCache, filter_key
+from utils.cube import EngagementCube
+from utils.indexing import TimeIndex
+from utils.sql_backend import SQLBackend, sql_available
+from utils.timeseries import ROLLING_WINDOWS, TimeSeriesStore, add_rolling_rates, rolling_column, select_period
+
 # Set page configuration
 st.set_page_config(
     page_title="Brut Engagement Dashboard",
@@ -607,82 +619,98 @@ setTimeout(() => {{
 """, unsafe_allow_html=True)
 
 # Load Data
-@st.cache_data
-def load_data():
-    try:
-        # Try to read the CSV file
-        df = pd.read_csv('brut_social_media_data.csv')
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
-    except FileNotFoundError:
-        # If file doesn't exist, generate synthetic data
-        st.warning("Data file not found. Generating synthetic data...")
-        
-        # This is a simplified version of the data generation code
-        # In a real application, you would import the data generator module
-        # For demo purposes, we'll create a simple dataset here
-        
-        import numpy as np
-        from datetime import datetime, timedelta
-        import random
-        
-        # Constants
-        platforms = ['Instagram', 'TikTok', 'Facebook', 'YouTube', 'Twitter']
-        regions = ['France', 'US', 'India', 'UK', 'Germany', 'Brazil', 'Japan']
-        themes = ['Environment', 'Social Justice', 'Politics', 'Entertainment', 
-                'Technology', 'Health', 'Sports', 'Fashion', 'Food', 'Travel']
-        
-        # Generate dates for the last 6 months
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=180)
-        dates = [start_date + timedelta(days=x) for x in range((end_date - start_date).days)]
-        
-        # Create empty dataframe
-        data = []
-        
-        # Generate 1000 posts with realistic patterns
-        for _ in range(1000):
-            date = random.choice(dates)
-            platform = random.choice(platforms)
-            region = random.choice(regions)
-            theme = random.choice(themes)
-            
-            # Simplified metrics generation
-            views = np.random.randint(5000, 100000)
-            likes = int(views * np.random.uniform(0.05, 0.2))
-            shares = int(views * np.random.uniform(0.01, 0.05))
-            comments = int(views * np.random.uniform(0.01, 0.05))
-            
-            # Add randomized hour component to timestamp
-            hour = np.random.randint(8, 23)
-            minute = np.random.randint(0, 60)
-            timestamp = datetime(date.year, date.month, date.day, hour, minute)
-            
-            data.append({
-                'timestamp': timestamp,
-                'platform': platform,
-                'region': region,
-                'content_theme': theme,
-                'views': views,
-                'likes': likes,
-                'shares': shares,
-                'comments': comments
-            })
-        
-        # Create DataFrame and sort by timestamp
-        df = pd.DataFrame(data)
-        df = df.sort_values('timestamp')
-        df.to_csv('brut_social_media_data.csv', index=False)
-        return df
+# Dataset path without extension: a partitioned directory, a .feather file or a
+# .csv file with this name is loaded, in that order (see data.data_loader)
+DATA_PATH = 'brut_social_media_data'
+# Seconds between checks of the data files for changes
+DATA_WATCH_INTERVAL = 5
+# Also hash the data files on every check, to catch rewrites that keep their size
+# and modification time (reads the whole dataset every DATA_WATCH_INTERVAL)
+DATA_CONTENT_HASH = os.environ.get('BRUT_DATA_CONTENT_HASH', '') == '1'
+# Query engine for filters and aggregations: 'pandas' works on the loaded frames,
+# 'duckdb' runs them in SQL against the data files (see utils.sql_backend)
+QUERY_BACKEND = os.environ.get('BRUT_QUERY_BACKEND', 'pandas')
+# Limits of the cache of query results shared by all sessions
+QUERY_CACHE_ENTRIES = 64
+QUERY_CACHE_BYTES = 256 * 1024 ** 2
+
+@st.cache_resource
+def get_data_loader():
+    # One loader per server process. It keeps the loaded frames, shared read-only by
+    # every session, keyed on the fingerprint kept by its background file watcher,
+    # so reruns never re-read unchanged files and a changed file is loaded once.
+    return DataLoader(DATA_PATH, watch_interval=DATA_WATCH_INTERVAL, content_hash=DATA_CONTENT_HASH)
+
+@st.cache_resource(max_entries=16)
+def get_data_index(data_fingerprint, window):
+    # Time and bitmap indexes over a loaded frame, built once per data version and
+    # window so that filter changes never rescan the dimension columns
+    return TimeIndex(get_data_loader().load(*window), dimensions=DIMENSIONS)
+
+@st.cache_resource(max_entries=16)
+def get_data_cube(data_fingerprint, window):
+    # Day x platform x region x theme sums over the same rows; every chart and
+    # KPI is read from it, so render cost does not grow with the number of posts
+    return EngagementCube(get_data_index(data_fingerprint, window).df)
+
+@st.cache_resource(max_entries=16)
+def get_time_series_store(window):
+    # Daily sums and rolling windows kept across data versions: when rows are only
+    # appended, a new version folds in just the new rows (see utils.timeseries)
+    return TimeSeriesStore()
+
+@st.cache_resource
+def get_query_cache():
+    # Query results per data version and filter spec, so switching back to a
+    # recent filter combination skips filtering and aggregation entirely
+    return ResultCache(QUERY_CACHE_ENTRIES, QUERY_CACHE_BYTES)
+
+@st.cache_resource
+def get_sql_backend():
+    # Opens one in-memory DuckDB database per server process; queries read the files directly
+    return SQLBackend(DATA_PATH)
+
+@st.cache_resource(max_entries=16)
+def get_sql_date_bounds(data_fingerprint):
+    # First and last day per data version, so reruns do not scan the files again
+    return get_sql_backend().date_bounds()
+
+@st.cache_resource(max_entries=16)
+def get_sql_dimension_values(data_fingerprint, window):
+    # Filter options per data version and window, the SQL counterpart of the bitmap index values
+    sql_backend = get_sql_backend()
+    return {column: sql_backend.dimension_values(column, start_date=window[0], end_date=window[1])
+            for column in DIMENSIONS}
 
 # Show loading animation
 loading_animation()
 
-# Load data
-df = load_data()
+use_sql = QUERY_BACKEND == 'duckdb'
+if use_sql and not sql_available():
+    st.warning("duckdb is not installed, falling back to the pandas query backend.")
+    use_sql = False
 
-# Calculate additional metrics
-df['engagement_rate'] = ((df['likes'] + df['comments'] + df['shares']) / df['views'] * 100).round(2)
+# Load data
+data_loader = get_data_loader()
+if not os.path.exists(resolve_source(DATA_PATH)[1]):
+    st.warning("Data file not found. Generating synthetic data...")
+    if use_sql:
+        # DuckDB reads the files itself, so write them without keeping the rows in memory
+        load_dataset(DATA_PATH, compact=False)
+# Partitioned datasets answer from their partition names; rows are loaded once the window is chosen
+if use_sql:
+    min_date, max_date = get_sql_date_bounds(data_loader.fingerprint)
+else:
+    min_date, max_date = data_loader.date_bounds()
+
+# Rerun open sessions when the data files change, without waiting for user input
+if hasattr(st, 'fragment'):
+    @st.fragment(run_every=DATA_WATCH_INTERVAL)
+    def reload_on_data_change(loaded_version):
+        if get_data_loader().version != loaded_version:
+            st.rerun()
+    
+    reload_on_data_change(data_loader.version)
 
 # Sidebar with retro styling
 st.sidebar.markdown("""
@@ -729,41 +757,85 @@ st.sidebar.markdown("""
 </style>
 <div class="sidebar-section">TIME WINDOW</div>
 """, unsafe_allow_html=True)
-min_date = df['timestamp'].min().date()
-max_date = df['timestamp'].max().date()
 start_date = st.sidebar.date_input('START DATE', min_date, min_value=min_date, max_value=max_date)
 end_date = st.sidebar.date_input('END DATE', max_date, min_value=min_date, max_value=max_date)
 
+if use_sql:
+    # Nothing is loaded into memory: filters and aggregations run in DuckDB
+    sql_backend = get_sql_backend()
+    dimension_values = get_sql_dimension_values(data_loader.fingerprint, (start_date, end_date))
+else:
+    # Single-file datasets are loaded whole, so every window shares one index
+    window = (start_date, end_date) if data_loader.partitioned else (None, None)
+    data_index = get_data_index(data_loader.fingerprint, window)
+    data_cube = get_data_cube(data_loader.fingerprint, window)
+    time_series_store = get_time_series_store(window)
+    time_series_store.sync(data_index.df, data_loader.fingerprint)
+    dimension_values = data_index.bitmaps.values
+
 # Platform Filter
 st.sidebar.markdown('<div class="sidebar-section">PLATFORMS</div>', unsafe_allow_html=True)
-all_platforms = df['platform'].unique().tolist()
+all_platforms = dimension_values['platform']
 selected_platforms = st.sidebar.multiselect('SELECT PLATFORMS', all_platforms, default=all_platforms)
 
 # Region Filter
 st.sidebar.markdown('<div class="sidebar-section">REGIONS</div>', unsafe_allow_html=True)
-all_regions = df['region'].unique().tolist()
+all_regions = dimension_values['region']
 selected_regions = st.sidebar.multiselect('SELECT REGIONS', all_regions, default=all_regions)
 
 # Content Theme Filter
 st.sidebar.markdown('<div class="sidebar-section">CONTENT THEMES</div>', unsafe_allow_html=True)
-all_themes = df['content_theme'].unique().tolist()
+all_themes = dimension_values['content_theme']
 selected_themes = st.sidebar.multiselect('SELECT THEMES', all_themes, default=all_themes)
 
 # Filter data based on selections
-filtered_df = df[
-    (df['timestamp'].dt.date >= start_date) & 
-    (df['timestamp'].dt.date <= end_date) &
-    (df['platform'].isin(selected_platforms)) &
-    (df['region'].isin(selected_regions)) &
-    (df['content_theme'].isin(selected_themes))
-]
+filters = {
+    'start_date': start_date,
+    'end_date': end_date,
+    'platforms': selected_platforms,
+    'regions': selected_regions,
+    'themes': selected_themes
+}
+def run_queries():
+    # Everything the dashboard shows for the current filters, or None when no rows match
+    # An empty selection matches nothing (the query helpers treat it as "no filter")
+    if not (selected_platforms and selected_regions and selected_themes):
+        return None
+    # The trend chart uses the coarsest of hours, days, weeks and months that still gives enough points
+    period = select_period(start_date, end_date)
+    if use_sql:
+        kpis = sql_backend.calculate_kpis(**filters)
+        if kpis['total_posts'] == 0:
+            return None
+        time_series = sql_backend.get_time_series_data(period, **filters)
+        return {
+            'kpis': kpis,
+            'platform_data': sql_backend.get_platform_data(**filters),
+            'theme_data': sql_backend.get_theme_data(**filters),
+            'time_series': add_rolling_rates(time_series) if period == 'day' else time_series,
+            'display_df': sql_backend.prepare_display_data(**filters)
+        }
+    # Never copies or modifies the loaded frame, which is shared by every session
+    results = dashboard_data(data_index, **filters, cube=data_cube)
+    if results is None:
+        return None
+    if period == 'hour':
+        # Hours are only picked for windows of a few days, so they are summed from those rows
+        results['time_series'] = get_time_series_data(filter_dataframe(data_index, **filters), period)
+    else:
+        # Days, with their rolling windows, weeks and months come from the incremental store
+        results['time_series'] = time_series_store.query(**filters, period=period)
+    return results
+
+query_key = ('duckdb' if use_sql else 'pandas', data_loader.fingerprint, filter_key(**filters))
+results = get_query_cache().get_or_compute(query_key, run_queries)
 
 # Reset button with retro styling
 if st.sidebar.button('RESET FILTERS'):
     st.experimental_rerun()
 
 # Check if data is available after filtering
-if filtered_df.empty:
+if results is None:
     st.error("NO DATA AVAILABLE FOR SELECTED FILTERS. PLEASE ADJUST YOUR SELECTION.")
     st.stop()
 
@@ -771,10 +843,11 @@ if filtered_df.empty:
 st.markdown('<div class="section-header" style="animation: neonPulse 2s infinite;">PERFORMANCE STATS</div>', unsafe_allow_html=True)
 
 # Calculate KPIs
-total_views = filtered_df['views'].sum()
-avg_likes = int(filtered_df['likes'].mean())
-avg_engagement = filtered_df['engagement_rate'].mean()
-total_posts = len(filtered_df)
+kpis = results['kpis']
+total_views = kpis['total_views']
+avg_likes = kpis['avg_likes']
+avg_engagement = kpis['avg_engagement']
+total_posts = kpis['total_posts']
 
 # Create 4 columns for KPIs
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
@@ -829,13 +902,7 @@ with col1:
     st.markdown('<div style="font-family: \'VT323\', monospace; font-size: 1.5rem; color: #39ff14; margin-bottom: 10px; animation: pulse 2s infinite;">ENGAGEMENT BY PLATFORM</div>', unsafe_allow_html=True)
     
     # Prepare data for platform comparison
-    platform_data = filtered_df.groupby('platform').agg({
-        'views': 'sum',
-        'likes': 'sum',
-        'comments': 'sum',
-        'shares': 'sum',
-        'engagement_rate': 'mean'
-    }).reset_index()
+    platform_data = results['platform_data']
     
     # Create a custom bar chart with plotly and retro gaming colors
     fig = go.Figure()
@@ -915,10 +982,7 @@ with col2:
     st.markdown('<div style="font-family: \'VT323\', monospace; font-size: 1.5rem; color: #ff00ff; margin-bottom: 10px; animation: pulse 2s infinite;">TOP PERFORMING THEMES</div>', unsafe_allow_html=True)
     
     # Prepare data for content theme analysis
-    theme_data = filtered_df.groupby('content_theme').agg({
-        'views': 'sum',
-        'engagement_rate': 'mean'
-    }).reset_index().sort_values('engagement_rate', ascending=False).head(5)
+    theme_data = results['theme_data']
     
     # Create a retro-styled horizontal bar chart
     fig = go.Figure()
@@ -991,16 +1055,7 @@ with col2:
 st.markdown('<div style="font-family: \'VT323\', monospace; font-size: 1.5rem; color: #00ffff; margin-bottom: 10px; animation: pulse 2s infinite;">ENGAGEMENT TRENDS OVER TIME</div>', unsafe_allow_html=True)
 
 # Prepare time series data
-time_data = filtered_df.copy()
-time_data['date'] = time_data['timestamp'].dt.date
-time_series = time_data.groupby('date').agg({
-    'views': 'sum',
-    'likes': 'sum',
-    'comments': 'sum',
-    'shares': 'sum'
-}).reset_index()
-
-time_series['engagement_rate'] = ((time_series['likes'] + time_series['comments'] + time_series['shares']) / time_series['views'] * 100).round(2)
+time_series = results['time_series']
 
 # Create a retro-styled line chart
 fig = go.Figure()
@@ -1022,6 +1077,18 @@ fig.add_trace(go.Scatter(
     )
 ))
 
+# Add rolling averages (daily series only)
+for window, color in zip(ROLLING_WINDOWS, ['#ff00ff', '#39ff14']):
+    if rolling_column(window) not in time_series:
+        continue
+    fig.add_trace(go.Scatter(
+        x=time_series['date'],
+        y=time_series[rolling_column(window)],
+        mode='lines',
+        name=f'{window}-Day Average',
+        line=dict(color=color, width=2, dash='dot')
+    ))
+
 # Customize layout
 fig.update_layout(
     paper_bgcolor='#000000',
@@ -1083,9 +1150,7 @@ st.plotly_chart(fig, use_container_width=True)
 st.markdown('<div class="section-header" style="animation: neonPulse 2s infinite;">DATA TABLE</div>', unsafe_allow_html=True)
 
 # Prepare display data
-display_df = filtered_df.copy()
-display_df['timestamp'] = display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
-display_df = display_df.sort_values('timestamp', ascending=False)
+display_df = results['display_df']
 
 # Custom CSS for dataframe
 st.markdown("""
@@ -3,4 +3,6 @@ Data package for Brut Engagement Dashboard.
 This module contains the data generation and loading functions.
 """
 
-from .data_generator import generate_synthetic_data
\ No newline at end of file
+from .data_generator import generate_synthetic_data, load_or_generate_data
+from .data_loader import DataLoader, load_dataset
+from .ingest import read_files
\ No newline at end of file
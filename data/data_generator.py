@@ -8,15 +8,136 @@ import numpy as np
 from datetime import datetime, timedelta
 import random
 import os
+import csv
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 
-def generate_synthetic_data(output_path="brut_social_media_data.csv", num_records=1000, seed=42):
+from .ingest import is_multi_source, read_files
+from .schema import (LINEAGE_ATTR, PLATFORMS, REGIONS, THEMES, add_derived_metrics, apply_schema,
+                     compact_frame)
+from .storage import (load_csv_columnar, read_csv_header, read_csv_tail, read_dataset,
+                      read_marker, storage_format, write_dataset, write_partitioned)
+
+# (mean, std) of base views and engagement ratios for each platform
+PLATFORM_PROFILES = {
+    'Instagram': {'views': (30000, 10000), 'like_ratio': (0.12, 0.04),
+                  'share_ratio': (0.02, 0.01), 'comment_ratio': (0.03, 0.01)},
+    'TikTok': {'views': (50000, 15000), 'like_ratio': (0.15, 0.05),
+               'share_ratio': (0.04, 0.02), 'comment_ratio': (0.02, 0.01)},
+    'Facebook': {'views': (40000, 12000), 'like_ratio': (0.1, 0.04),
+                 'share_ratio': (0.03, 0.01), 'comment_ratio': (0.02, 0.01)},
+    'YouTube': {'views': (25000, 8000), 'like_ratio': (0.08, 0.03),
+                'share_ratio': (0.01, 0.005), 'comment_ratio': (0.04, 0.02)},
+    'Twitter': {'views': (15000, 5000), 'like_ratio': (0.07, 0.03),
+                'share_ratio': (0.05, 0.02), 'comment_ratio': (0.01, 0.005)},
+}
+
+# (mean, std) of the popularity multiplier for each theme and region
+THEME_MULTIPLIERS = {
+    'Environment': (1.2, 0.1), 'Social Justice': (1.3, 0.1), 'Politics': (1.1, 0.2),
+    'Entertainment': (1.4, 0.1), 'Technology': (0.9, 0.1), 'Health': (1.0, 0.1),
+    'Sports': (1.1, 0.1), 'Fashion': (0.8, 0.1), 'Food': (0.9, 0.1), 'Travel': (1.0, 0.1)
+}
+REGION_MULTIPLIERS = {
+    'France': (1.1, 0.1), 'US': (1.2, 0.1), 'India': (1.3, 0.1), 'UK': (1.0, 0.1),
+    'Germany': (0.9, 0.1), 'Brazil': (1.1, 0.1), 'Japan': (0.8, 0.1)
+}
+
+# (mean, std) of the weekend engagement boost
+WEEKEND_BOOST = (1.2, 0.1)
+
+# Number of days of history generated by default
+HISTORY_DAYS = 180
+
+# Average posts per day of the default 1000-record, 180-day dataset
+RECORDS_PER_DAY = 6
+
+def _history_window(days=HISTORY_DAYS, end_date=None):
     """
-    Generate synthetic social media engagement data for Brut dashboard.
+    Return the first day and number of days covered by a generated history.
+    
+    Matches the loop generator: days whole days ending the day before end_date.
+    """
+    end_date = end_date or datetime.now()
+    start_date = end_date - timedelta(days=days)
+    return start_date.date(), (end_date - start_date).days
+
+def _profile_arrays(table, keys, field=None):
+    """Gather (mean, std) pairs from a parameter table into two arrays ordered like keys."""
+    pairs = [table[key][field] if field else table[key] for key in keys]
+    means, stds = zip(*pairs)
+    return np.array(means), np.array(stds)
+
+def _generate_records(rng, day_index, start_day):
+    """
+    Draw engagement records for the given day offsets as whole columns.
+    
+    Parameters:
+    -----------
+    rng : numpy.random.Generator
+        Random generator to draw from
+    day_index : numpy.ndarray
+        Day offset from start_day for every record
+    start_day : datetime.date
+        First day of the history
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        Records sorted by timestamp, with the same columns as the loop generator
+    """
+    day_index = np.asarray(day_index, dtype=np.int64)
+    n = len(day_index)
+    
+    platform_codes = rng.integers(0, len(PLATFORMS), n)
+    region_codes = rng.integers(0, len(REGIONS), n)
+    theme_codes = rng.integers(0, len(THEMES), n)
+    
+    # Per-platform base distributions, gathered by platform code
+    draws = {}
+    for field in ('views', 'like_ratio', 'share_ratio', 'comment_ratio'):
+        means, stds = _profile_arrays(PLATFORM_PROFILES, PLATFORMS, field)
+        draws[field] = rng.normal(means[platform_codes], stds[platform_codes])
+    
+    means, stds = _profile_arrays(THEME_MULTIPLIERS, THEMES)
+    theme_multiplier = rng.normal(means[theme_codes], stds[theme_codes])
+    means, stds = _profile_arrays(REGION_MULTIPLIERS, REGIONS)
+    region_multiplier = rng.normal(means[region_codes], stds[region_codes])
+    
+    # Calculate final metrics (astype truncates toward zero like int())
+    views = np.maximum((draws['views'] * theme_multiplier * region_multiplier).astype(np.int64), 100)
+    likes = np.maximum((views * draws['like_ratio']).astype(np.int64), 0)
+    shares = np.maximum((views * draws['share_ratio']).astype(np.int64), 0)
+    comments = np.maximum((views * draws['comment_ratio']).astype(np.int64), 0)
+    
+    # Weekend boost, drawn only for weekend posts
+    weekend = (start_day.weekday() + day_index) % 7 >= 5
+    boosts = rng.normal(WEEKEND_BOOST[0], WEEKEND_BOOST[1], (4, int(weekend.sum())))
+    for metric, boost in zip((views, likes, shares, comments), boosts):
+        metric[weekend] = (metric[weekend] * boost).astype(np.int64)
+    
+    # Timestamps in minutes between 08:00 and 22:59
+    minutes = day_index * 1440 + rng.integers(8, 23, n) * 60 + rng.integers(0, 60, n)
+    timestamps = np.datetime64(start_day, 'm') + minutes.astype('timedelta64[m]')
+    
+    order = np.argsort(timestamps, kind='stable')
+    return pd.DataFrame({
+        'timestamp': timestamps[order].astype('datetime64[ns]'),
+        'platform': pd.Categorical.from_codes(platform_codes[order], categories=PLATFORMS),
+        'region': pd.Categorical.from_codes(region_codes[order], categories=REGIONS),
+        'content_theme': pd.Categorical.from_codes(theme_codes[order], categories=THEMES),
+        'views': views[order],
+        'likes': likes[order],
+        'shares': shares[order],
+        'comments': comments[order]
+    })
+
+def _generate_rows(num_records, seed):
+    """
+    Generate records one row at a time (original generator).
     
     Parameters:
     -----------
-    output_path : str
-        Path to save the CSV file
     num_records : int
         Number of records to generate
     seed : int
@@ -25,20 +146,15 @@ def generate_synthetic_data(output_path="brut_social_media_data.csv", num_record
     Returns:
     --------
     pandas.DataFrame
-        The generated data
+        The generated data, sorted by timestamp
     """
-    # Set random seed for reproducibility
+    # Set random seeds for reproducibility
     np.random.seed(seed)
-    
-    # Constants
-    platforms = ['Instagram', 'TikTok', 'Facebook', 'YouTube', 'Twitter']
-    regions = ['France', 'US', 'India', 'UK', 'Germany', 'Brazil', 'Japan']
-    themes = ['Environment', 'Social Justice', 'Politics', 'Entertainment', 
-              'Technology', 'Health', 'Sports', 'Fashion', 'Food', 'Travel']
+    py_random = random.Random(seed)
 
     # Generate dates for the last 6 months
     end_date = datetime.now()
-    start_date = end_date - timedelta(days=180)
+    start_date = end_date - timedelta(days=HISTORY_DAYS)
     dates = [start_date + timedelta(days=x) for x in range((end_date - start_date).days)]
 
     # Create empty dataframe
@@ -46,10 +162,10 @@ def generate_synthetic_data(output_path="brut_social_media_data.csv", num_record
 
     # Generate posts with realistic patterns
     for _ in range(num_records):
-        date = random.choice(dates)
-        platform = random.choice(platforms)
-        region = random.choice(regions)
-        theme = random.choice(themes)
+        date = py_random.choice(dates)
+        platform = py_random.choice(PLATFORMS)
+        region = py_random.choice(REGIONS)
+        theme = py_random.choice(THEMES)
         
         # Base metrics with some patterns
         # Different platforms have different engagement patterns
@@ -137,43 +253,460 @@ def generate_synthetic_data(output_path="brut_social_media_data.csv", num_record
     df = pd.DataFrame(data)
     df = df.sort_values('timestamp')
 
-    # Save to CSV if output path is provided
+    return df
+
+def generate_synthetic_data(output_path="brut_social_media_data.csv", num_records=1000, seed=42,
+                            vectorized=False):
+    """
+    Generate synthetic social media engagement data for Brut dashboard.
+    
+    Parameters:
+    -----------
+    output_path : str
+        Path to save the data (.csv, .parquet, .feather or .arrow)
+    num_records : int
+        Number of records to generate
+    seed : int
+        Random seed for reproducibility
+    vectorized : bool
+        Draw all records as whole NumPy arrays instead of row by row.
+        Much faster for large num_records; same distributions, different random draws.
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        The generated data
+    """
+    if vectorized:
+        rng = np.random.default_rng(seed)
+        start_day, num_days = _history_window()
+        df = _generate_records(rng, rng.integers(0, num_days, num_records), start_day)
+    else:
+        df = _generate_rows(num_records, seed)
+
+    # Save to CSV or Parquet if output path is provided
     if output_path:
-        # Create directory if it doesn't exist
-        output_dir = os.path.dirname(output_path)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        df.to_csv(output_path, index=False)
+        write_dataset(df, output_path)
         print(f"Generated {len(df)} records of synthetic social media data")
         print(f"Saved to {output_path}")
 
     return df
 
-def load_or_generate_data(file_path="brut_social_media_data.csv"):
+def _day_layout(seed_seq, num_records, end_date=None):
+    """Draw how many of num_records fall on each day of the history window."""
+    start_day, num_days = _history_window(end_date=end_date)
+    rng = np.random.default_rng(seed_seq)
+    return start_day, rng.multinomial(num_records, np.full(num_days, 1.0 / num_days))
+
+def _day_offsets(day_ends, start, stop):
+    """Return the day offset of every record position in [start, stop) given cumulative per-day counts."""
+    return np.searchsorted(day_ends, np.arange(start, stop), side='right')
+
+def iter_synthetic_chunks(num_records=1000, chunk_size=1_000_000, seed=42, end_date=None):
+    """
+    Generate synthetic data as a stream of fixed-size chunks.
+    
+    Records are laid out in day order up front (a multinomial draw over the
+    history window), so each chunk covers a contiguous run of days and only
+    one chunk is ever held in memory. Chunks are cut at record counts rather
+    than day boundaries, so the last day of one chunk may continue in the
+    next and the concatenated stream is not sorted by timestamp overall.
+    
+    Parameters:
+    -----------
+    num_records : int
+        Total number of records to generate
+    chunk_size : int
+        Number of records per chunk (the last chunk may be smaller)
+    seed : int
+        Random seed for reproducibility
+    end_date : datetime, optional
+        End of the history window (defaults to now)
+    
+    Yields:
+    -------
+    pandas.DataFrame
+        Chunks each sorted by timestamp; sort the concatenation if a global
+        order is needed
+    """
+    seed_seq = np.random.SeedSequence(seed)
+    start_day, day_counts = _day_layout(seed_seq, num_records, end_date)
+    day_ends = np.cumsum(day_counts)
+    
+    for start in range(0, num_records, chunk_size):
+        stop = min(start + chunk_size, num_records)
+        # Each chunk draws from its own child stream of the seed
+        rng = np.random.default_rng(seed_seq.spawn(1)[0])
+        yield _generate_records(rng, _day_offsets(day_ends, start, stop), start_day)
+
+def generate_partitioned_data(output_dir="brut_social_media_data", num_records=1000,
+                              chunk_size=1_000_000, seed=42, granularity='day', file_format='csv'):
+    """
+    Stream synthetic data to disk as date-partitioned files.
+    
+    Each chunk from iter_synthetic_chunks is written as soon as it is generated,
+    to output_dir/date=YYYY-MM-DD/part-NNNNN.csv (see storage.write_partitioned),
+    so peak memory is bounded by chunk_size rather than num_records.
+    
+    Parameters:
+    -----------
+    output_dir : str
+        Root directory of the partitioned dataset
+    num_records : int
+        Total number of records to generate
+    chunk_size : int
+        Number of records generated and written at a time
+    seed : int
+        Random seed for reproducibility
+    granularity : str
+        Partition by 'day' or 'month'
+    file_format : str
+        'csv', 'parquet' or 'arrow'
+    
+    Returns:
+    --------
+    list
+        Paths of the written files
+    """
+    paths = []
+    for i, chunk in enumerate(iter_synthetic_chunks(num_records, chunk_size, seed)):
+        paths.extend(write_partitioned(chunk, output_dir, f"part-{i:05d}", granularity, file_format))
+    
+    print(f"Generated {num_records} records of synthetic social media data")
+    print(f"Saved {len(paths)} partition files to {output_dir}")
+    return paths
+
+def _shard_days(day_counts, shards):
+    """
+    Split the day range into contiguous shards holding roughly equal record counts.
+    
+    Returns:
+    --------
+    numpy.ndarray
+        shards + 1 day boundaries; shard i covers days [bounds[i], bounds[i + 1])
+    """
+    targets = np.arange(1, shards) * day_counts.sum() / shards
+    cuts = np.searchsorted(np.cumsum(day_counts), targets, side='right')
+    return np.concatenate(([0], cuts, [len(day_counts)]))
+
+def _chunk_days(day_counts, first_day, last_day, chunk_size):
+    """
+    Split days [first_day, last_day) into runs of whole days of at most chunk_size records.
+    
+    A single day with more than chunk_size records forms a run of its own.
+    
+    Returns:
+    --------
+    list
+        Day boundaries; run i covers days [bounds[i], bounds[i + 1])
+    """
+    bounds = [first_day]
+    total = 0
+    for day in range(first_day, last_day):
+        if total and total + day_counts[day] > chunk_size:
+            bounds.append(day)
+            total = 0
+        total += day_counts[day]
+    bounds.append(last_day)
+    return bounds
+
+def _generate_days(seed_seq, start_day, day_counts, first_day, last_day):
+    """
+    Generate the records for days [first_day, last_day), each day from its own child stream of seed_seq.
+    
+    A day's records depend only on the seed and the day, not on the shard or
+    chunk it is generated in.
+    """
+    if first_day == last_day:
+        # An empty range still returns the columns
+        return _generate_records(np.random.default_rng(seed_seq), np.empty(0, dtype=np.int64), start_day)
+    
+    days = []
+    for day in range(first_day, last_day):
+        day_seq = np.random.SeedSequence(seed_seq.entropy, spawn_key=seed_seq.spawn_key + (day,))
+        days.append(_generate_records(np.random.default_rng(day_seq), np.full(day_counts[day], day), start_day))
+    return pd.concat(days, ignore_index=True)
+
+def _generate_shard(seed_seq, start_day, day_counts, first_day, last_day, output_dir, part_name,
+                    granularity, file_format, chunk_size):
+    """
+    Generate the records for days [first_day, last_day) in a worker process.
+    
+    Records are generated chunk_size at a time, cut at day boundaries so the
+    chunks stay in timestamp order. With an output_dir each chunk is written as
+    part_name-NNNNN files as soon as it is generated and the paths are returned;
+    otherwise the chunks are concatenated and returned.
+    """
+    bounds = _chunk_days(day_counts, first_day, last_day, chunk_size)
+    chunks = []
+    for i, (low, high) in enumerate(zip(bounds[:-1], bounds[1:])):
+        chunk = _generate_days(seed_seq, start_day, day_counts, low, high)
+        if output_dir:
+            chunks.extend(write_partitioned(chunk, output_dir, f"{part_name}-{i:05d}",
+                                            granularity, file_format))
+        else:
+            chunks.append(chunk)
+    if output_dir:
+        return chunks
+    return pd.concat(chunks, ignore_index=True)
+
+def generate_parallel_data(output_path="brut_social_media_data.csv", num_records=1000, seed=42,
+                           workers=None, partitioned=False, end_date=None, granularity='day',
+                           file_format='csv', chunk_size=1_000_000):
+    """
+    Generate synthetic data across a pool of worker processes.
+    
+    The history is split into contiguous day ranges with about num_records / workers
+    records each, and every day draws from its own child of SeedSequence(seed).
+    Each worker generates its shard chunk_size records at a time, cut at day
+    boundaries, and with partitioned=True writes every chunk as soon as it is
+    generated, so a worker holds one chunk rather than its whole shard. The rows
+    are identical for a given seed and end_date whatever the worker count and
+    chunk size, and concatenating the shards keeps them sorted by timestamp.
+    
+    Parameters:
+    -----------
+    output_path : str
+        Path to save the data (.csv or .parquet), or root directory when partitioned is True
+    num_records : int
+        Number of records to generate
+    seed : int
+        Random seed for reproducibility
+    workers : int, optional
+        Number of worker processes (defaults to the CPU count)
+    partitioned : bool
+        Let each worker write its own date=YYYY-MM-DD/shard-NNNNN-NNNNN.csv files
+        instead of returning rows to the parent process
+    end_date : datetime, optional
+        End of the history window (defaults to now); pin it to reproduce
+        a dataset on a later day
+    granularity : str
+        Partition by 'day' or 'month' when partitioned is True
+    file_format : str
+        'csv', 'parquet' or 'arrow' when partitioned is True
+    chunk_size : int
+        Number of records each worker generates (and writes) at a time
+    
+    Returns:
+    --------
+    pandas.DataFrame or list
+        The generated data, or the written file paths when partitioned is True
+    """
+    workers = workers or os.cpu_count() or 1
+    seed_seq = np.random.SeedSequence(seed)
+    start_day, day_counts = _day_layout(seed_seq, num_records, end_date)
+    bounds = _shard_days(day_counts, workers)
+    
+    output_dir = output_path if partitioned else None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_generate_shard, seed_seq, start_day, day_counts,
+                            bounds[i], bounds[i + 1], output_dir, f"shard-{i:05d}",
+                            granularity, file_format, chunk_size)
+            for i in range(workers)
+        ]
+        results = [future.result() for future in futures]
+    
+    if partitioned:
+        paths = [path for shard_paths in results for path in shard_paths]
+        print(f"Generated {num_records} records of synthetic social media data")
+        print(f"Saved {len(paths)} partition files to {output_path}")
+        return paths
+    
+    df = pd.concat(results, ignore_index=True)
+    if output_path:
+        write_dataset(df, output_path)
+        print(f"Generated {len(df)} records of synthetic social media data")
+        print(f"Saved to {output_path}")
+    
+    return df
+
+def _read_last_timestamp(file_path, block_size=65536):
+    """
+    Return the timestamp of the last row of a timestamp-sorted CSV file.
+    
+    Only the tail of the file is read.
+    """
+    columns = read_csv_header(file_path)
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - block_size, 0))
+        lines = [line for line in f.read().decode('utf-8').splitlines() if line.strip()]
+    
+    last_row = next(csv.reader([lines[-1]]))
+    if last_row == columns:
+        return None
+    return pd.Timestamp(last_row[columns.index('timestamp')])
+
+def append_new_days(file_path="brut_social_media_data.csv", records_per_day=RECORDS_PER_DAY,
+                    seed=None, end_date=None):
+    """
+    Extend an existing dataset with the days after its last timestamp.
+    
+    New days run from the day after the last row up to the day before end_date,
+    the same window convention as generate_synthetic_data. Only the new rows are
+    generated and appended to the file; the existing rows are never read.
+    
+    Parameters:
+    -----------
+    file_path : str
+        Path to an existing, timestamp-sorted CSV file
+    records_per_day : float
+        Average number of posts per new day (Poisson distributed)
+    seed : int, optional
+        Random seed for reproducibility
+    end_date : datetime, optional
+        End of the history window (defaults to now)
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        The appended rows (empty if the dataset is already up to date)
+    """
+    columns = read_csv_header(file_path)
+    last_timestamp = _read_last_timestamp(file_path)
+    window_start, num_days = _history_window(end_date=end_date)
+    window_end = window_start + timedelta(days=num_days)
+    
+    first_day = (last_timestamp + timedelta(days=1)).date() if last_timestamp is not None else window_start
+    new_days = (window_end - first_day).days
+    if new_days <= 0:
+        return pd.DataFrame(columns=columns)
+    
+    rng = np.random.default_rng(seed)
+    day_counts = rng.poisson(records_per_day, new_days)
+    day_index = np.repeat(np.arange(new_days), day_counts)
+    # Files written before the derived metrics were left out of CSVs have them in their header
+    df = add_derived_metrics(_generate_records(rng, day_index, first_day))[columns]
+    
+    df.to_csv(file_path, mode='a', header=False, index=False)
+    print(f"Appended {len(df)} records for {new_days} new days to {file_path}")
+    return df
+
+# Rows already parsed by load_or_generate_data(incremental=True), keyed by absolute path and compact
+_incremental_cache = {}
+_load_ids = itertools.count()
+
+def _load_csv_incremental(file_path, compact=False):
+    """
+    Load a CSV file, parsing only the bytes appended since the previous call.
+    
+    The cached prefix is reused as long as the file has only grown and its
+    last cached bytes are unchanged; anything else triggers a full load.
+    With compact, the cache holds the compacted frame and returns it as is,
+    so the rows are kept in memory once. Every load is tagged with
+    attrs[LINEAGE_ATTR] (see data.schema), so that consumers such as
+    utils.timeseries.TimeSeriesStore can tell an append from a rewrite
+    (see data.data_loader.frame_lineage).
+    """
+    key = (os.path.abspath(file_path), compact)
+    size = os.path.getsize(file_path)
+    cached = _incremental_cache.get(key)
+    
+    if cached is not None and size >= cached['offset'] and read_marker(file_path, cached['offset']) == cached['marker']:
+        if size == cached['offset']:
+            return cached['df']
+        tail, offset = read_csv_tail(file_path, read_csv_header(file_path), cached['offset'], size)
+        if tail is None:
+            return cached['df']
+        # The cached rows carry the derived metrics, so derive them for the new rows too
+        df = apply_schema(pd.concat([cached['df'], add_derived_metrics(apply_schema(tail))], ignore_index=True))
+        if compact:
+            df = compact_frame(df)
+        df.attrs[LINEAGE_ATTR] = (next(_load_ids), cached['df'].attrs[LINEAGE_ATTR][0], len(cached['df']))
+        _incremental_cache[key] = {'df': df, 'offset': offset, 'marker': read_marker(file_path, offset)}
+        return df
+    
+    df = load_csv_columnar(file_path)
+    if compact:
+        df = compact_frame(df)
+    df.attrs[LINEAGE_ATTR] = (next(_load_ids), None, 0)
+    _incremental_cache[key] = {'df': df, 'offset': size, 'marker': read_marker(file_path, size)}
+    return df
+
+def load_or_generate_data(file_path="brut_social_media_data.csv", incremental=False, compact=False):
     """
     Load existing data or generate new data if file doesn't exist.
     
     Parameters:
     -----------
     file_path : str
-        Path to the CSV file
+        Path to the data file (.csv, .parquet, .feather or .arrow). CSV files are
+        loaded through a typed Parquet copy kept next to them when pyarrow is
+        installed; Arrow files are memory-mapped. A glob pattern or a directory
+        reads every matching file in parallel (see data.ingest.read_files).
+    incremental : bool
+        Keep the loaded CSV rows in memory and, on later calls, parse only the rows
+        appended since (e.g. by append_new_days)
+    compact : bool
+        Shrink the result to the narrowest column types with compact_frame (with
+        incremental, the compacted frame is the one kept in memory)
     
     Returns:
     --------
     pandas.DataFrame
         The loaded or generated data
     """
+    if is_multi_source(file_path):
+        df = read_files(file_path)
+        return compact_frame(df) if compact else df
+    
     try:
-        # Try to read the CSV file
-        df = pd.read_csv(file_path)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
+        if storage_format(file_path) != 'csv':
+            df = read_dataset(file_path)
+        elif incremental:
+            # Compacted before caching, so the cache and the caller share one copy
+            return _load_csv_incremental(file_path, compact)
+        else:
+            df = load_csv_columnar(file_path)
     except FileNotFoundError:
         # If file doesn't exist, generate synthetic data
         print(f"Data file not found at {file_path}. Generating synthetic data...")
-        return generate_synthetic_data(file_path)
+        df = generate_synthetic_data(file_path)
+    
+    return compact_frame(df) if compact else df
 
 if __name__ == "__main__":
+    # Run as: python -m data.data_generator [options]
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate synthetic Brut engagement data.")
+    parser.add_argument("--output", default=None,
+                        help="CSV, Parquet or Feather file, or root directory with --partitioned")
+    parser.add_argument("--records", type=int, default=1000, help="Number of records to generate")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--vectorized", action="store_true", help="Use the vectorized generator")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="Stream chunks to date-partitioned files")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000,
+                        help="Records per chunk with --partitioned or --workers")
+    parser.add_argument("--granularity", choices=["day", "month"], default="day",
+                        help="Partition size with --partitioned")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv",
+                        help="File format with --partitioned")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Generate in parallel with this many processes")
+    parser.add_argument("--append", action="store_true",
+                        help="Append the days missing since the last row of --output")
+    parser.add_argument("--convert", default=None, metavar="SOURCE",
+                        help="Convert an existing dataset to the format of --output instead of generating")
+    args = parser.parse_args()
+    
     # When run directly, generate a new dataset
-    generate_synthetic_data()
\ No newline at end of file
+    if args.convert:
+        write_dataset(load_or_generate_data(args.convert), args.output)
+        print(f"Converted {args.convert} to {args.output}")
+    elif args.append:
+        append_new_days(args.output or "brut_social_media_data.csv", seed=args.seed)
+    elif args.workers:
+        default_output = "brut_social_media_data" if args.partitioned else "brut_social_media_data.csv"
+        generate_parallel_data(args.output or default_output, args.records, args.seed,
+                               args.workers, args.partitioned, granularity=args.granularity,
+                               file_format=args.format, chunk_size=args.chunk_size)
+    elif args.partitioned:
+        generate_partitioned_data(args.output or "brut_social_media_data", args.records,
+                                  args.chunk_size, args.seed, args.granularity, args.format)
+    else:
+        generate_synthetic_data(args.output or "brut_social_media_data.csv", args.records,
+                                args.seed, args.vectorized)
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Data access layer for Brut Engagement Dashboard.
+Finds the dataset on disk, loads it through the storage backends and caches it,
+generating synthetic data when no dataset exists yet.
+"""
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+from .data_generator import load_or_generate_data
+from .schema import LINEAGE_ATTR, add_derived_metrics, compact_frame
+from .storage import (DatasetWatcher, fingerprint, partition_date_bounds, read_memory_mapped,
+                      read_partitioned)
+
+# Base path of the dataset; the extensions below are tried in this order
+DEFAULT_DATA_PATH = 'brut_social_media_data'
+
+# Dataset layouts, by preference: a partitioned directory, a memory-mappable Arrow file, a CSV file
+SOURCE_KINDS = ['partitioned', 'arrow', 'csv']
+
+def dataset_paths(base_path=DEFAULT_DATA_PATH):
+    """
+    Return the path of every supported dataset layout for a base path.
+    
+    Parameters:
+    -----------
+    base_path : str
+        Dataset path without extension
+    
+    Returns:
+    --------
+    dict
+        Path for each kind in SOURCE_KINDS
+    """
+    return {
+        'partitioned': base_path,
+        'arrow': base_path + '.feather',
+        'csv': base_path + '.csv'
+    }
+
+def resolve_source(base_path=DEFAULT_DATA_PATH):
+    """
+    Pick the dataset layout to load for a base path.
+    
+    Returns:
+    --------
+    tuple
+        (kind, path); falls back to the CSV path, generated on first load, when nothing exists
+    """
+    paths = dataset_paths(base_path)
+    if os.path.isdir(paths['partitioned']):
+        return 'partitioned', paths['partitioned']
+    if os.path.exists(paths['arrow']):
+        return 'arrow', paths['arrow']
+    return 'csv', paths['csv']
+
+# Frames returned by load_dataset for each incremental CSV load id (see frame_lineage)
+_lineage_frames = weakref.WeakValueDictionary()
+
+def frame_lineage(df):
+    """
+    Return how a frame returned by load_dataset relates to the previous load of its file.
+    
+    Only the frame load_dataset returned carries a lineage: pandas copies attrs
+    to every frame derived from it, whose rows may differ, so those get None.
+    
+    Returns:
+    --------
+    tuple or None
+        (load id, id of the load it extends by appended rows only or None, number
+        of rows of that load), or None for frames of other sources or derived frames
+    """
+    lineage = df.attrs.get(LINEAGE_ATTR)
+    if lineage is None or _lineage_frames.get(lineage[0]) is not df:
+        return None
+    return lineage
+
+def load_dataset(base_path=DEFAULT_DATA_PATH, start_date=None, end_date=None, compact=True):
+    """
+    Load the dataset found at a base path, without caching.
+    
+    Parameters:
+    -----------
+    base_path : str
+        Dataset path without extension
+    start_date : datetime.date, optional
+        First day needed; only used to skip partitions
+    end_date : datetime.date, optional
+        Last day needed; only used to skip partitions
+    compact : bool
+        Shrink the frame with compact_frame (memory-mapped Arrow data is never compacted)
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        The loaded data with the derived metrics (see add_derived_metrics), read
+        from the files when stored there and computed here otherwise. Partitioned
+        datasets are trimmed to the date range; single-file datasets are returned
+        whole, so callers still filter by date.
+    """
+    kind, path = resolve_source(base_path)
+    if kind == 'partitioned':
+        df = read_partitioned(path, start_date, end_date)
+        df = compact_frame(df) if compact else df
+    elif kind == 'arrow':
+        return add_derived_metrics(read_memory_mapped(path))
+    else:
+        # The incremental cache compacts the frame it keeps, and that is the one returned
+        df = load_or_generate_data(path, incremental=True, compact=compact)
+    df = add_derived_metrics(df)
+    if LINEAGE_ATTR in df.attrs:
+        # This frame, not the ones derived from it later, is the one that extends the previous load
+        _lineage_frames[df.attrs[LINEAGE_ATTR][0]] = df
+    return df
+
+class DataLoader:
+    """
+    Cached access to the engagement dataset, shared by the dashboard and scripts.
+    
+    Loaded frames are kept per date window and reused until the dataset's
+    fingerprint changes, so repeated calls never re-read unchanged files.
+    Returned frames are shared between callers and must be treated as read-only.
+    
+    Parameters:
+    -----------
+    base_path : str
+        Dataset path without extension (see dataset_paths)
+    watch_interval : float, optional
+        Poll the files in a background DatasetWatcher every watch_interval seconds.
+        Without it the files are fingerprinted on every load.
+    max_entries : int
+        Number of loaded date windows kept in memory
+    compact : bool
+        Shrink loaded frames with compact_frame
+    content_hash : bool
+        Also hash the file contents, so rewrites that keep the size and mtime
+        are noticed (see fingerprint). Every check then reads the whole dataset.
+    """
+    
+    def __init__(self, base_path=DEFAULT_DATA_PATH, watch_interval=None, max_entries=16, compact=True,
+                 content_hash=False):
+        self.base_path = base_path
+        self.max_entries = max_entries
+        self.compact = compact
+        self.content_hash = content_hash
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._watcher = None
+        if watch_interval:
+            self._watcher = DatasetWatcher(
+                dataset_paths(base_path).values(), interval=watch_interval, content_hash=content_hash
+            ).start()
+    
+    @property
+    def fingerprint(self):
+        """Fingerprint of every dataset path; changes whenever the data on disk changes."""
+        if self._watcher is not None:
+            return self._watcher.fingerprint
+        return tuple(fingerprint(path, self.content_hash) for path in dataset_paths(self.base_path).values())
+    
+    @property
+    def version(self):
+        """Number of changes seen by the background watcher (always 0 without one)."""
+        return self._watcher.version if self._watcher is not None else 0
+    
+    @property
+    def partitioned(self):
+        """True if the dataset is a partitioned directory, loaded one date window at a time."""
+        return resolve_source(self.base_path)[0] == 'partitioned'
+    
+    def date_bounds(self):
+        """
+        Return the first and last day of the dataset.
+        
+        Partitioned datasets answer from their directory names without reading rows.
+        """
+        kind, path = resolve_source(self.base_path)
+        if kind == 'partitioned':
+            return partition_date_bounds(path)
+        df = self.load()
+        return df['timestamp'].min().date(), df['timestamp'].max().date()
+    
+    def load(self, start_date=None, end_date=None):
+        """
+        Return the dataset, loading it only if it is not cached for the current fingerprint.
+        
+        Parameters:
+        -----------
+        start_date : datetime.date, optional
+            First day needed (partitioned datasets only read overlapping partitions)
+        end_date : datetime.date, optional
+            Last day needed
+        
+        Returns:
+        --------
+        pandas.DataFrame
+            See load_dataset
+        """
+        current = self.fingerprint
+        # Single-file datasets are loaded whole, so every window shares one entry
+        key = (start_date, end_date) if self.partitioned else None
+        
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == current:
+                self._cache.move_to_end(key)
+                return cached[1]
+            
+            df = load_dataset(self.base_path, start_date, end_date, self.compact)
+            # Loading may have generated the dataset, so fingerprint it again afterwards
+            if self._watcher is not None:
+                self._watcher.check()
+            self._cache[key] = (self.fingerprint, df)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            return df
+    
+    def close(self):
+        """Stop the background watcher, if any."""
+        if self._watcher is not None:
+            self._watcher.stop()
@@ -0,0 +1,164 @@
+"""
+Multi-file ingest for Brut Engagement Dashboard.
+Reads every data file matched by a glob or found under a directory in parallel,
+normalizes each to the dataset schema and concatenates them into one frame.
+"""
+
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+
+from .schema import COLUMNS, DERIVED_COLUMNS, DIMENSIONS, METRIC_DTYPE, METRICS, apply_schema
+from .storage import FORMATS, columnar_path, read_dataset, storage_format
+
+def is_multi_source(source):
+    """Return True if source is a directory or a glob pattern rather than a single file."""
+    return os.path.isdir(source) or glob.has_magic(source)
+
+def source_files(source):
+    """
+    List the data files of a multi-file source.
+    
+    Parameters:
+    -----------
+    source : str
+        A glob pattern (e.g. 'exports/*.csv', 'exports/**/*.csv') or a directory,
+        searched recursively (so partitioned datasets are read whole)
+    
+    Returns:
+    --------
+    list
+        Paths of the matched files with a supported extension, sorted. The Parquet
+        copies kept next to CSV files (see data.storage.load_csv_columnar) are
+        left out, since they hold the same rows.
+    
+    Raises:
+    -------
+    FileNotFoundError
+        If no data file matches
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(directory, name)
+                 for directory, _, names in os.walk(source) for name in names]
+    else:
+        paths = glob.glob(source, recursive=True)
+    
+    files = [path for path in paths
+             if os.path.isfile(path) and os.path.splitext(path)[1].lower() in FORMATS]
+    copies = {columnar_path(path) for path in files if storage_format(path) == 'csv'}
+    files = sorted(path for path in files if path not in copies)
+    if not files:
+        raise FileNotFoundError(f"No data files found for {source}")
+    return files
+
+def _has_schema(df):
+    """Return True if a frame already has the declared column types."""
+    return (all(column in df.columns for column in COLUMNS)
+            and df['timestamp'].dtype == np.dtype('datetime64[ns]')
+            and all(isinstance(df[column].dtype, pd.CategoricalDtype) for column in DIMENSIONS)
+            and all(df[column].dtype == METRIC_DTYPE for column in METRICS))
+
+def _read_file(path):
+    """Read one file with the declared column types, keeping only the stored and derived columns."""
+    # CSVs are parsed directly: writing Parquet copies next to them would add
+    # files to export folders and to the partitions of partitioned datasets
+    df = read_dataset(path)
+    if not _has_schema(df):
+        df = apply_schema(df)
+    return df[[column for column in COLUMNS + list(DERIVED_COLUMNS) if column in df.columns]]
+
+def concat_frames(frames):
+    """
+    Concatenate frames with the declared schema into one newly allocated frame.
+    
+    Each output column is allocated once at its final size and filled frame by
+    frame, rather than growing through intermediate copies. Dimension codes are
+    remapped onto one shared category list: the DIMENSIONS values first, then any
+    unknown values in sorted order.
+    
+    Parameters:
+    -----------
+    frames : list
+        pandas.DataFrame objects with the declared column types
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        The rows of every frame, in order, with a fresh RangeIndex. Derived
+        columns are kept if every frame has them.
+    """
+    total = sum(len(df) for df in frames)
+    bounds = np.cumsum([0] + [len(df) for df in frames])
+    
+    timestamps = np.empty(total, dtype='datetime64[ns]')
+    for df, start, stop in zip(frames, bounds[:-1], bounds[1:]):
+        timestamps[start:stop] = df['timestamp'].values
+    columns = {'timestamp': timestamps}
+    
+    for column, known in DIMENSIONS.items():
+        seen = set().union(*(df[column].cat.categories for df in frames))
+        categories = list(known) + sorted(seen - set(known))
+        position = {value: index for index, value in enumerate(categories)}
+        codes = np.empty(total, dtype=np.int8 if len(categories) < 128 else np.int32)
+        for df, start, stop in zip(frames, bounds[:-1], bounds[1:]):
+            # The extra trailing -1 keeps missing values (code -1) missing
+            mapping = np.array([position[value] for value in df[column].cat.categories] + [-1],
+                               dtype=codes.dtype)
+            codes[start:stop] = mapping[df[column].cat.codes.values]
+        columns[column] = pd.Categorical.from_codes(codes, categories=categories, validate=False)
+    
+    for column in METRICS:
+        values = np.empty(total, dtype=METRIC_DTYPE)
+        for df, start, stop in zip(frames, bounds[:-1], bounds[1:]):
+            values[start:stop] = df[column].values
+        columns[column] = values
+    
+    # Derived columns are kept when every frame has them, so they are not recomputed
+    for column, dtype in DERIVED_COLUMNS.items():
+        if frames and all(column in df.columns for df in frames):
+            values = np.empty(total, dtype=dtype)
+            for df, start, stop in zip(frames, bounds[:-1], bounds[1:]):
+                values[start:stop] = df[column].values
+            columns[column] = values
+    
+    return pd.DataFrame(columns, copy=False)
+
+def read_files(source, workers=None, use_processes=None):
+    """
+    Read a glob or a directory of data files in parallel into one frame.
+    
+    Parameters:
+    -----------
+    source : str
+        A glob pattern or a directory (see source_files). Files may mix formats.
+    workers : int, optional
+        Number of files parsed at once (default: os.cpu_count())
+    use_processes : bool, optional
+        Parse in a process pool rather than a thread pool. By default processes
+        are used when there are CSV files, whose parsing holds the GIL, and
+        threads otherwise, since pyarrow releases it and memory-mapped Arrow
+        files are not copied between threads.
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        The rows of every file with the declared column types, sorted by timestamp
+    """
+    files = source_files(source)
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if use_processes is None:
+        use_processes = any(storage_format(path) == 'csv' for path in files)
+    
+    if workers == 1:
+        frames = [_read_file(path) for path in files]
+    else:
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            frames = list(executor.map(_read_file, files))
+    
+    df = concat_frames(frames)
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+    return df
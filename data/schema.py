@@ -0,0 +1,224 @@
+"""
+Dataset schema for Brut Engagement Dashboard.
+Declares the columns, dimension values and storage types of the engagement data.
+"""
+
+import pandas as pd
+import numpy as np
+
+# Dimension values
+PLATFORMS = ['Instagram', 'TikTok', 'Facebook', 'YouTube', 'Twitter']
+REGIONS = ['France', 'US', 'India', 'UK', 'Germany', 'Brazil', 'Japan']
+THEMES = ['Environment', 'Social Justice', 'Politics', 'Entertainment',
+          'Technology', 'Health', 'Sports', 'Fashion', 'Food', 'Travel']
+
+# Dimension columns and their known values, in display order
+DIMENSIONS = {
+    'platform': PLATFORMS,
+    'region': REGIONS,
+    'content_theme': THEMES
+}
+
+# Engagement metric columns
+METRICS = ['views', 'likes', 'shares', 'comments']
+
+# Stored columns, in file order
+COLUMNS = ['timestamp'] + list(DIMENSIONS) + METRICS
+
+# Storage type of every metric column
+METRIC_DTYPE = np.int32
+
+# Metrics derived from the stored columns once at load time, and their types:
+# engagement rate in percent (2 decimals), per-view ratios, weekday (0 = Monday) and hour
+DERIVED_COLUMNS = {
+    'engagement_rate': np.float32,
+    'like_ratio': np.float32,
+    'share_ratio': np.float32,
+    'comment_ratio': np.float32,
+    'weekday': np.int8,
+    'hour': np.int8
+}
+
+# attrs key set on incremental CSV loads: (load id, id of the load it extends by
+# appended rows only or None, number of rows of that load). Read it through
+# data.data_loader.frame_lineage, since pandas copies attrs to derived frames.
+LINEAGE_ATTR = 'lineage'
+
+def _categories(values, known):
+    """Known dimension values first, then any unseen values in sorted order."""
+    extra = sorted(set(values.dropna().unique()) - set(known))
+    return list(known) + extra
+
+def _categorical(values, known):
+    """Convert a column to a categorical ordered like known."""
+    # pd.Categorical rather than astype: astype keeps the existing order of an
+    # unordered categorical whose category set is unchanged
+    return pd.Series(pd.Categorical(values, categories=_categories(values, known)), index=values.index)
+
+def _smallest_int_dtype(values):
+    """Return the narrowest signed integer dtype holding every value of a column."""
+    if not len(values):
+        return np.dtype(np.int8)
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        limits = np.iinfo(dtype)
+        if limits.min <= low and high <= limits.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+def apply_schema(df):
+    """
+    Convert a frame with the stored columns to the declared schema.
+    
+    Timestamps become datetime64[ns], dimensions become categoricals ordered like
+    DIMENSIONS (unknown values are appended rather than dropped) and metrics become
+    METRIC_DTYPE. Columns outside the schema are kept unchanged.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame with at least the COLUMNS columns
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        A new data frame with the declared column types
+    
+    Raises:
+    -------
+    ValueError
+        If a metric does not fit in METRIC_DTYPE
+    """
+    columns = {'timestamp': pd.to_datetime(df['timestamp']).astype('datetime64[ns]')}
+    
+    for column, known in DIMENSIONS.items():
+        columns[column] = _categorical(df[column], known)
+    
+    limits = np.iinfo(METRIC_DTYPE)
+    for column in METRICS:
+        values = df[column]
+        if len(values) and (values.min() < limits.min or values.max() > limits.max):
+            raise ValueError(f"Column '{column}' does not fit in {np.dtype(METRIC_DTYPE).name}")
+        columns[column] = values.astype(METRIC_DTYPE)
+    
+    typed = pd.DataFrame(columns, index=df.index)
+    for column in df.columns:
+        if column not in typed.columns:
+            typed[column] = df[column]
+    return typed
+
+def arrow_schema(derived=()):
+    """
+    Return the pyarrow schema of the stored columns.
+    
+    Dimensions are dictionary-encoded with int8 indices and metrics are int32.
+    Columns of DERIVED_COLUMNS listed in derived are appended with their
+    declared types. Requires pyarrow.
+    """
+    import pyarrow as pa
+    
+    return pa.schema(
+        [pa.field('timestamp', pa.timestamp('ns'))]
+        + [pa.field(column, pa.dictionary(pa.int8(), pa.string())) for column in DIMENSIONS]
+        + [pa.field(column, pa.from_numpy_dtype(np.dtype(METRIC_DTYPE))) for column in METRICS]
+        + [pa.field(column, pa.from_numpy_dtype(np.dtype(DERIVED_COLUMNS[column]))) for column in derived]
+    )
+
+def frame_bytes(df):
+    """Return the memory used by a frame, including its index and string contents."""
+    return int(df.memory_usage(deep=True).sum())
+
+def engagement_rate(df):
+    """
+    Per-row engagement rate in percent, rounded to 2 decimals.
+    
+    Metrics may be narrow integers after compaction, so they are added in
+    int64 (a row-wise df[...].sum(axis=1) also would, but is far slower).
+    """
+    interactions = df['likes'].astype(np.int64) + df['comments'] + df['shares']
+    return (interactions / df['views'] * 100).round(2)
+
+def add_derived_metrics(df):
+    """
+    Add the DERIVED_COLUMNS a frame does not have yet.
+    
+    Run once when a dataset is loaded; the derived columns are then stored with
+    it (see data.storage.write_dataset) and reused rather than recomputed.
+    Their arrays are made read-only, since loaded frames are shared.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame with the stored columns
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        A new frame sharing the input's columns, plus the derived ones
+        (the input itself if nothing was missing)
+    """
+    missing = [column for column in DERIVED_COLUMNS if column not in df.columns]
+    if not missing:
+        return df
+    
+    views = df['views'].values
+    timestamps = df['timestamp'].dt
+    formulas = {
+        'engagement_rate': lambda: engagement_rate(df).values,
+        'like_ratio': lambda: df['likes'].values / views,
+        'share_ratio': lambda: df['shares'].values / views,
+        'comment_ratio': lambda: df['comments'].values / views,
+        'weekday': lambda: timestamps.dayofweek.values,
+        'hour': lambda: timestamps.hour.values
+    }
+    derived = {}
+    for column in missing:
+        values = np.asarray(formulas[column](), dtype=DERIVED_COLUMNS[column])
+        values.flags.writeable = False
+        derived[column] = values
+    return df.assign(**derived)
+
+def compact_frame(df, verbose=False):
+    """
+    Shrink a loaded frame to the narrowest column types that hold its data.
+    
+    Dimensions become categoricals with the fixed DIMENSIONS category order,
+    metrics are downcast to the smallest integer width that fits their range and
+    engagement_rate, when present, becomes float32. Metrics may end up as narrow
+    as int8/int16, so widen the first operand before adding them row-wise, as
+    engagement_rate does with df['likes'].astype(np.int64) + df['comments'].
+    
+    The memory use before and after is recorded in the returned frame's
+    attrs['compaction'] as {'bytes_before': ..., 'bytes_after': ...}.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame with engagement metrics
+    verbose : bool
+        Print the memory use before and after
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        A new, compacted data frame
+    """
+    bytes_before = frame_bytes(df)
+    compact = df.copy(deep=False)
+    
+    for column, known in DIMENSIONS.items():
+        if column in compact.columns:
+            compact[column] = _categorical(compact[column], known)
+    
+    for column in METRICS:
+        if column in compact.columns:
+            compact[column] = compact[column].astype(_smallest_int_dtype(compact[column]))
+    
+    if 'engagement_rate' in compact.columns:
+        compact['engagement_rate'] = compact['engagement_rate'].astype(np.float32)
+    
+    bytes_after = frame_bytes(compact)
+    compact.attrs['compaction'] = {'bytes_before': bytes_before, 'bytes_after': bytes_after}
+    if verbose:
+        print(f"Compacted data from {bytes_before / 1e6:.1f} MB to {bytes_after / 1e6:.1f} MB")
+    return compact
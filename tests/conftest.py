@@ -0,0 +1,19 @@
+"""
+Shared fixtures for the tests.
+
+Run as: python -m pytest tests
+"""
+
+import pytest
+
+from data.data_generator import iter_synthetic_chunks
+from data.ingest import concat_frames
+from data.schema import add_derived_metrics
+from utils.indexing import TimeIndex
+
+from .helpers import NUM_RECORDS
+
+@pytest.fixture(scope='session')
+def frame():
+    """Synthetic posts sorted by timestamp, with the derived metrics, like loaded data."""
+    return add_derived_metrics(TimeIndex(concat_frames(list(iter_synthetic_chunks(NUM_RECORDS)))).df)
@@ -0,0 +1,64 @@
+"""
+Shared constants and pandas reference computations for the tests.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.schema import DIMENSIONS, METRICS
+
+# Posts in the shared test frame (see conftest.frame)
+NUM_RECORDS = 200_000
+
+FILTERS = [
+    {},
+    {'platforms': ['TikTok', 'Instagram'], 'regions': ['US']},
+    {'themes': ['Food'], 'regions': []},
+    {'platforms': ['Myspace']},
+]
+
+def window(frame, days):
+    """Filters for the last days of the frame."""
+    end_date = frame['timestamp'].iloc[-1].date()
+    return {'start_date': end_date - timedelta(days=days - 1), 'end_date': end_date}
+
+def pandas_rows(df, start_date=None, end_date=None, platforms=None, regions=None, themes=None):
+    """The rows matching dashboard filters, selected with isin and date comparisons."""
+    keep = np.ones(len(df), dtype=bool)
+    if start_date is not None:
+        keep &= (df['timestamp'].dt.date >= start_date).values
+    if end_date is not None:
+        keep &= (df['timestamp'].dt.date <= end_date).values
+    for column, selected in zip(DIMENSIONS, (platforms, regions, themes)):
+        if selected:
+            keep &= df[column].isin(selected).values
+    return df[keep]
+
+def expected_kpis(rows):
+    """The KPIs of utils.data_processing.calculate_kpis, computed with plain pandas."""
+    return {
+        'total_views': int(rows['views'].astype(np.int64).sum()),
+        'avg_likes': int(rows['likes'].mean()),
+        'avg_engagement': rows['engagement_rate'].astype(np.float64).mean(),
+        'total_posts': len(rows)
+    }
+
+def assert_kpis_equal(kpis, expected):
+    assert kpis['total_views'] == expected['total_views']
+    assert kpis['avg_likes'] == expected['avg_likes']
+    assert kpis['total_posts'] == expected['total_posts']
+    assert kpis['avg_engagement'] == pytest.approx(expected['avg_engagement'], rel=1e-6)
+
+def expected_daily(rows):
+    """Daily metric sums, indexed by every calendar day between the first and last row."""
+    days = rows['timestamp'].dt.floor('D')
+    daily = rows[METRICS].astype(np.int64).groupby(days.values).sum()
+    return daily.reindex(pd.date_range(daily.index[0], daily.index[-1]), fill_value=0)
+
+def assert_latest_rows(display_df, rows):
+    """The displayed rows are the 10 most recent ones (ties at the cut may be any of them)."""
+    latest = rows['timestamp'].sort_values().tail(10).dt.strftime('%Y-%m-%d %H:%M')
+    assert sorted(display_df['timestamp']) == sorted(latest)
@@ -0,0 +1,31 @@
+"""
+Tests for the mergeable dashboard aggregates: merged partial aggregates must
+match plain pandas on all the rows, whatever the merge order.
+"""
+
+import numpy as np
+
+from data.schema import METRICS
+from utils.aggregates import EngagementAggregate
+
+from .helpers import assert_kpis_equal, assert_latest_rows, expected_daily, expected_kpis
+
+def test_aggregates_merge_matches_pandas(frame):
+    parts = np.array_split(np.random.default_rng(1).permutation(len(frame)), 5)
+    partials = [EngagementAggregate.from_frame(frame.iloc[np.sort(part)]) for part in parts]
+    left = partials[0].merge(partials[1]).merge(partials[2].merge(partials[3].merge(partials[4])))
+    results = EngagementAggregate.merge_all(partials).results()
+    
+    assert_kpis_equal(results['kpis'], expected_kpis(frame))
+    assert_kpis_equal(left.results()['kpis'], expected_kpis(frame))
+    
+    platforms = frame.groupby('platform', observed=True)['views'].sum()
+    platform_data = results['platform_data'].set_index('platform')
+    assert platform_data['views'].astype(np.int64).to_dict() == platforms.to_dict()
+    
+    daily = expected_daily(frame)
+    daily = daily[daily['views'] > 0]
+    for column in METRICS:
+        np.testing.assert_array_equal(results['time_series'][column].values, daily[column].values)
+    
+    assert_latest_rows(results['display_df'], frame)
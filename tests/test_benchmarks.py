@@ -0,0 +1,14 @@
+"""
+Tests for the render profile: one dashboard render must not copy the loaded frame.
+"""
+
+from utils.benchmarks import profile_render
+
+from .helpers import window
+
+def test_render_peak_memory(frame):
+    filters = {**window(frame, 30), 'platforms': ['TikTok', 'Instagram'], 'regions': ['US']}
+    report = profile_render(frame, **filters)
+    # Neither render copies the loaded frame; the cube render reads a few thousand cells
+    assert report['render_peak_bytes'] < report['frame_bytes'] / 2
+    assert report['cube_render_peak_bytes'] < report['frame_bytes'] / 20
@@ -0,0 +1,45 @@
+"""
+Tests for the engagement cube: the dashboard data it answers must match plain
+pandas on the filtered rows.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.schema import DIMENSIONS, METRICS
+from utils.cube import EngagementCube
+from utils.data_processing import dashboard_data
+from utils.indexing import TimeIndex
+
+from .helpers import FILTERS, assert_kpis_equal, assert_latest_rows, expected_daily, expected_kpis, pandas_rows, window
+
+@pytest.fixture(scope='module')
+def index(frame):
+    return TimeIndex(frame, dimensions=DIMENSIONS)
+
+@pytest.mark.parametrize('filters', FILTERS)
+@pytest.mark.parametrize('days', [None, 45])
+def test_cube_matches_pandas(frame, index, filters, days):
+    filters = {**filters, **(window(frame, days) if days else {})}
+    rows = pandas_rows(frame, **filters)
+    results = dashboard_data(index, **filters, cube=EngagementCube(index.df))
+    if rows.empty:
+        assert results is None
+        return
+    
+    assert_kpis_equal(results['kpis'], expected_kpis(rows))
+    
+    platforms = rows.groupby('platform', observed=True)[['views', 'likes', 'comments', 'shares']].sum()
+    platform_data = results['platform_data'].set_index('platform')
+    for column in platforms.columns:
+        assert platform_data[column].astype(np.int64).to_dict() == platforms[column].to_dict()
+    
+    daily = expected_daily(rows)
+    daily = daily[daily['views'] > 0]
+    time_series = results['time_series']
+    assert list(pd.to_datetime(time_series['date'])) == list(daily.index)
+    for column in METRICS:
+        np.testing.assert_array_equal(time_series[column].values, daily[column].values)
+    
+    assert_latest_rows(results['display_df'], rows)
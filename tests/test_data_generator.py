@@ -0,0 +1,19 @@
+"""
+Tests for the parallel generator: its rows must not depend on how the work is split.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+from data.data_generator import generate_parallel_data
+
+def test_parallel_data_independent_of_workers_and_chunks():
+    def generate(workers, chunk_size):
+        return generate_parallel_data(None, num_records=20_000, seed=7, workers=workers,
+                                      end_date=datetime(2025, 6, 1), chunk_size=chunk_size)
+    
+    expected = generate(1, 1_000_000)
+    assert expected['timestamp'].is_monotonic_increasing
+    for workers, chunk_size in [(1, 500), (3, 2_000)]:
+        pd.testing.assert_frame_equal(generate(workers, chunk_size), expected)
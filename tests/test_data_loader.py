@@ -0,0 +1,48 @@
+"""
+Tests for the data access layer: incremental CSV loads keep one compacted
+copy of the rows, and content hashing notices rewrites that keep the size and
+modification time.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from data import data_generator
+from data.data_generator import append_new_days
+from data.data_loader import DataLoader, load_dataset
+from data.schema import COLUMNS
+
+def test_incremental_loads_keep_one_compacted_copy(frame, tmp_path):
+    base_path = str(tmp_path / 'data')
+    rows = frame.iloc[:5_000][COLUMNS]
+    rows.to_csv(base_path + '.csv', index=False)
+    cached = lambda: data_generator._incremental_cache[(os.path.abspath(base_path + '.csv'), True)]['df']
+    
+    df = load_dataset(base_path)
+    assert df is cached()
+    assert df['comments'].dtype.itemsize < np.dtype(np.int32).itemsize
+    
+    end_date = datetime.combine(rows['timestamp'].iloc[-1].date() + timedelta(days=3), datetime.min.time())
+    appended = append_new_days(base_path + '.csv', seed=1, end_date=end_date)
+    df = load_dataset(base_path)
+    assert df is cached()
+    assert len(df) == len(rows) + len(appended)
+    assert df['comments'].dtype.itemsize < np.dtype(np.int32).itemsize
+
+def test_content_hash_notices_rewrites_of_the_same_size(frame, tmp_path):
+    base_path = str(tmp_path / 'data')
+    path = base_path + '.csv'
+    rows = frame.iloc[:1_000][COLUMNS]
+    rows.to_csv(path, index=False)
+    stat = os.stat(path)
+    loaders = {content_hash: DataLoader(base_path, content_hash=content_hash) for content_hash in (False, True)}
+    before = {content_hash: loader.fingerprint for content_hash, loader in loaders.items()}
+    
+    # Same bytes in another order, with the old modification time
+    rows.iloc[::-1].to_csv(path, index=False)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.path.getsize(path) == stat.st_size
+    assert loaders[False].fingerprint == before[False]
+    assert loaders[True].fingerprint != before[True]
@@ -0,0 +1,32 @@
+"""
+Tests for the bitmap index: its masks must match isin on the same rows.
+"""
+
+import numpy as np
+import pytest
+
+from data.schema import DIMENSIONS
+from utils.indexing import BitmapIndex
+
+from .helpers import NUM_RECORDS
+
+@pytest.mark.parametrize('rows', [slice(None), slice(3, 1_001), slice(8, 16), slice(13, 13), slice(NUM_RECORDS - 5, None)])
+@pytest.mark.parametrize('selections', [
+    {'platform': ['TikTok']},
+    {'platform': ['TikTok', 'Twitter'], 'region': ['France', 'Japan']},
+    {'platform': ['TikTok'], 'region': [], 'content_theme': None},
+    {'content_theme': ['Food', 'Not a theme']},
+    {},
+])
+def test_bitmap_mask_matches_isin(frame, rows, selections):
+    bitmaps = BitmapIndex(frame, DIMENSIONS)
+    expected = np.ones(len(frame), dtype=bool)
+    for column, selected in selections.items():
+        if selected:
+            expected &= frame[column].isin(selected).values
+    np.testing.assert_array_equal(bitmaps.mask(selections, rows), expected[rows])
+
+def test_bitmap_values_in_order_of_first_appearance(frame):
+    bitmaps = BitmapIndex(frame, DIMENSIONS)
+    for column in DIMENSIONS:
+        assert bitmaps.values[column] == list(frame[column].unique())
@@ -0,0 +1,46 @@
+"""
+Tests for CSV storage: derived metrics are left out of the files and derived
+again on every load, the first one included, and a columnar copy that cannot
+be written does not fail the load.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from data import storage
+from data.data_generator import append_new_days
+from data.schema import COLUMNS, DERIVED_COLUMNS
+from data.storage import columnar_path, load_csv_columnar, read_csv_header, write_dataset
+
+def test_csv_loads_derive_the_same_columns(frame, tmp_path):
+    path = str(tmp_path / 'data.csv')
+    write_dataset(frame.iloc[:5_000], path)
+    assert read_csv_header(path) == COLUMNS
+    
+    cold = load_csv_columnar(path)
+    assert list(cold.columns) == COLUMNS + list(DERIVED_COLUMNS)
+    pd.testing.assert_frame_equal(load_csv_columnar(path), cold)
+
+def test_append_new_days_fills_derived_columns_in_the_header(frame, tmp_path):
+    path = str(tmp_path / 'data.csv')
+    rows = frame.iloc[:5_000]
+    rows.to_csv(path, index=False)
+    end_date = datetime.combine(rows['timestamp'].iloc[-1].date() + timedelta(days=3), datetime.min.time())
+    
+    appended = append_new_days(path, seed=1, end_date=end_date)
+    assert len(appended) > 0
+    assert list(appended.columns) == list(rows.columns)
+    assert not pd.read_csv(path).isna().any().any()
+
+def test_csv_loads_without_a_writable_columnar_copy(frame, tmp_path, monkeypatch):
+    path = str(tmp_path / 'data.csv')
+    write_dataset(frame.iloc[:5_000], path)
+    
+    def unwritable(*args, **kwargs):
+        raise PermissionError(13, 'Permission denied')
+    monkeypatch.setattr(storage.tempfile, 'mkstemp', unwritable)
+    
+    assert len(load_csv_columnar(path)) == 5_000
+    assert not os.path.exists(columnar_path(path))
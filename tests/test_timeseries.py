@@ -0,0 +1,81 @@
+"""
+Tests for the incremental time series store: its series must match plain
+pandas on the same rows, and sync must fold in only what the loader appended.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.data_loader import DataLoader
+from data.schema import COLUMNS, METRICS
+from utils.timeseries import HOURLY_MAX_DAYS, ROLLING_WINDOWS, TimeSeriesStore, rolling_column, select_period
+
+from .helpers import FILTERS, expected_daily, pandas_rows
+
+def test_time_series_store_matches_pandas(frame):
+    # Fold the rows in out of order and in uneven pieces, some of them sharing days
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(frame))
+    store = TimeSeriesStore()
+    for piece in np.array_split(order, [1_000, 1_001, 50_000, 120_000]):
+        store.append(frame.iloc[np.sort(piece)])
+    
+    for filters in FILTERS[:3]:
+        rows = pandas_rows(frame, **filters)
+        daily = expected_daily(rows).reindex(expected_daily(frame).index, fill_value=0)
+        time_series = store.query(**filters)
+        present = daily['views'] > 0
+        assert list(pd.to_datetime(time_series['date'])) == list(daily.index[present])
+        for column in METRICS:
+            np.testing.assert_array_equal(time_series[column].values, daily.loc[present, column].values)
+        for window_days in ROLLING_WINDOWS:
+            sums = daily.rolling(window_days, min_periods=1).sum()[present]
+            expected = ((sums['likes'] + sums['comments'] + sums['shares']) / sums['views'] * 100).round(2)
+            np.testing.assert_allclose(time_series[rolling_column(window_days)].values, expected.values)
+
+def test_time_series_store_sync_follows_the_loader(frame, tmp_path):
+    def rebuilt(df):
+        store = TimeSeriesStore()
+        store.append(df)
+        return store.query()
+    
+    rows = frame.iloc[:20_000][COLUMNS]
+    path = tmp_path / 'data.csv'
+    rows.iloc[:15_000].to_csv(path, index=False)
+    loader = DataLoader(str(tmp_path / 'data'))
+    store = TimeSeriesStore()
+    assert store.sync(loader.load(), loader.fingerprint) == 15_000
+    assert store.sync(loader.load(), loader.fingerprint) == 0
+    
+    # Appended rows are folded in alone
+    rows.iloc[15_000:18_000].to_csv(path, index=False, header=False, mode='a')
+    assert store.sync(loader.load(), loader.fingerprint) == 3_000
+    pd.testing.assert_frame_equal(store.query(), rebuilt(loader.load()))
+    
+    # A region the store has no cell for rebuilds it
+    tail = rows.iloc[18_000:].astype({'region': object})
+    tail.iloc[:10, tail.columns.get_loc('region')] = 'Spain'
+    tail.to_csv(path, index=False, header=False, mode='a')
+    assert store.sync(loader.load(), loader.fingerprint) == 20_000
+    pd.testing.assert_frame_equal(store.query(), rebuilt(loader.load()))
+    
+    # Same rows and timestamps with corrected metrics
+    pd.read_csv(path).assign(views=lambda df: df['views'] * 2).to_csv(path, index=False)
+    assert store.sync(loader.load(), loader.fingerprint) == 20_000
+    pd.testing.assert_frame_equal(store.query(), rebuilt(loader.load()))
+    
+    # Frames derived from a loaded frame do not pass for it
+    derived = loader.load().assign(views=1)
+    assert store.sync(derived) == 20_000
+    pd.testing.assert_frame_equal(store.query(), rebuilt(derived))
+
+@pytest.mark.parametrize('days, period', [
+    (1, 'hour'), (HOURLY_MAX_DAYS, 'hour'), (HOURLY_MAX_DAYS + 1, 'day'), (29, 'day'),
+    (90, 'day'), (400, 'week'), (1_500, 'month'),
+])
+def test_select_period(days, period):
+    start_date = date(2025, 3, 3)
+    assert select_period(start_date, start_date + timedelta(days=days - 1)) == period
@@ -3,5 +3,9 @@ Utilities package for Brut Engagement Dashboard.
 This package contains helper functions for data processing and visualization.
 """
 
+from .cache import ResultCache, filter_key
+from .cube import EngagementCube
 from .data_processing import calculate_kpis, filter_dataframe
+from .indexing import TimeIndex
+from .timeseries import TimeSeriesStore
 from .visualization import create_platform_chart, create_theme_chart, create_timeseries_chart
\ No newline at end of file
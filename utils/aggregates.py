@@ -0,0 +1,400 @@
+"""
+Streaming and sharded aggregation for the Brut Engagement Dashboard.
+Folds the data into mergeable running totals, one bounded chunk or one shard
+at a time, so datasets larger than memory can be aggregated without ever being
+loaded whole and the work can be split across processes.
+"""
+
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import reduce
+import pandas as pd
+import numpy as np
+
+from data.data_loader import DEFAULT_DATA_PATH, load_dataset, resolve_source
+from data.schema import COLUMNS, DERIVED_COLUMNS, engagement_rate
+from data.storage import (CSV_CHUNK_ROWS, csv_line_ranges, iter_csv_chunks, iter_csv_range, partition_date_bounds,
+                          read_memory_mapped)
+from .cube import CUBE_METRICS
+from .data_processing import filter_dataframe, prepare_display_data
+from .kernels import day_ordinals, dimension_codes, group_counts, group_sums, top_k_indices
+
+# Groups with running totals: one per platform, content theme and day
+AGGREGATE_GROUPS = ['platform', 'content_theme', 'date']
+
+# How aggregate_sharded can split the data: by date range or by region
+SHARD_KEYS = ['date', 'region']
+
+# Frame inherited by forked region-shard workers (set by their initializer)
+_shared_frame = None
+
+class EngagementAggregate:
+    """
+    Running totals behind the dashboard's KPIs and charts.
+    
+    Keeps the post count, metric sums and engagement-rate sum overall and per
+    platform, content theme and day, plus the most recent rows for the table.
+    Memory grows with the number of distinct platforms, themes and days, never
+    with the number of rows added.
+    
+    Aggregates are partial results: two of them over disjoint rows merge into
+    the aggregate of all those rows, and merging is associative, so partials
+    computed in any number of processes (or machines, since they pickle) can be
+    combined in any grouping.
+    
+    Parameters:
+    -----------
+    recent_rows : int
+        Number of most recent rows kept for the data table
+    """
+    
+    def __init__(self, recent_rows=10):
+        self.recent_rows = recent_rows
+        self.posts = 0
+        self.totals = dict.fromkeys(CUBE_METRICS, 0)
+        self.rate_sum = 0.0
+        self.groups = dict.fromkeys(AGGREGATE_GROUPS)
+        self.recent = None
+    
+    @classmethod
+    def from_frame(cls, df, recent_rows=10):
+        """Return the aggregate of a frame's rows."""
+        aggregate = cls(recent_rows)
+        aggregate.add(df)
+        return aggregate
+    
+    def merge(self, other):
+        """
+        Return the aggregate of the rows of both aggregates, leaving them unchanged.
+        
+        Parameters:
+        -----------
+        other : EngagementAggregate
+            Aggregate of other rows
+        
+        Returns:
+        --------
+        EngagementAggregate
+            A new aggregate; groups are kept in order of first appearance, this
+            aggregate's first
+        """
+        merged = EngagementAggregate(max(self.recent_rows, other.recent_rows))
+        for part in (self, other):
+            merged.posts += part.posts
+            for metric in CUBE_METRICS:
+                merged.totals[metric] += part.totals[metric]
+            merged.rate_sum += part.rate_sum
+            for group, totals in part.groups.items():
+                if totals is not None:
+                    merged._fold_group(group, totals)
+            if part.recent is not None:
+                merged._fold_recent(part.recent)
+        return merged
+    
+    @classmethod
+    def merge_all(cls, partials, recent_rows=10):
+        """Merge any number of aggregates, in order (an empty aggregate if there are none)."""
+        return reduce(cls.merge, partials, cls(recent_rows))
+    
+    @staticmethod
+    def _group_codes(df):
+        """Integer group code and label list of every row, per group."""
+        codes = {column: dimension_codes(df[column]) for column in AGGREGATE_GROUPS[:-1]}
+        ordinals, first_day, num_days = day_ordinals(df['timestamp'].values)
+        codes['date'] = ordinals, list((first_day + np.arange(num_days)).astype(object))
+        return codes
+    
+    def add(self, df):
+        """
+        Fold rows into the totals.
+        
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            Rows with the stored columns, already filtered
+        """
+        if df.empty:
+            return
+        rates = np.asarray(df['engagement_rate'] if 'engagement_rate' in df.columns else engagement_rate(df),
+                           dtype=DERIVED_COLUMNS['engagement_rate'])
+        values = {metric: df[metric].values for metric in CUBE_METRICS}
+        values['rate_sum'] = rates.astype(np.float64)
+        
+        self.posts += len(df)
+        for metric in CUBE_METRICS:
+            self.totals[metric] += int(values[metric].sum(dtype=np.int64))
+        self.rate_sum += float(values['rate_sum'].sum())
+        
+        for group, (codes, labels) in self._group_codes(df).items():
+            counts = group_counts(codes, len(labels))
+            present = np.flatnonzero(counts)
+            data = {'posts': counts[present]}
+            for name, column in values.items():
+                data[name] = group_sums(codes, column, len(labels))[present]
+            totals = pd.DataFrame(data, index=pd.Index(np.asarray(labels, dtype=object)[present], name=group))
+            self._fold_group(group, totals)
+        
+        recent = df if df['timestamp'].is_monotonic_increasing else df.sort_values('timestamp', kind='stable')
+        recent = recent.iloc[-self.recent_rows:]
+        if 'engagement_rate' not in recent.columns:
+            recent = recent.assign(engagement_rate=np.asarray(engagement_rate(recent), dtype=rates.dtype))
+        self._fold_recent(recent[COLUMNS + ['engagement_rate']])
+    
+    def _fold_group(self, group, totals):
+        """Add per-group totals, keeping groups in order of first appearance."""
+        current = self.groups[group]
+        self.groups[group] = totals if current is None else pd.concat([current, totals]).groupby(level=0, sort=False).sum()
+    
+    def _fold_recent(self, recent):
+        """Keep the most recent rows out of the kept ones and recent."""
+        if self.recent is not None:
+            recent = pd.concat([self.recent, recent], ignore_index=True).sort_values('timestamp', kind='stable')
+        self.recent = recent.iloc[-self.recent_rows:]
+    
+    def _group_data(self, group, metrics):
+        """Per-value metric sums and mean engagement rate of a group, as the chart functions return them."""
+        totals = self.groups[group]
+        data = {group: totals.index.values}
+        for metric in metrics:
+            data[metric] = totals[metric].values
+        data['engagement_rate'] = totals['rate_sum'].values / totals['posts'].values
+        return pd.DataFrame(data)
+    
+    def calculate_kpis(self):
+        """Return the KPIs (see utils.data_processing.calculate_kpis)."""
+        return {
+            'total_views': self.totals['views'],
+            'avg_likes': int(self.totals['likes'] / self.posts),
+            'avg_engagement': self.rate_sum / self.posts,
+            'total_posts': self.posts
+        }
+    
+    def get_platform_data(self):
+        """Aggregate by platform (see utils.data_processing.get_platform_data)."""
+        return self._group_data('platform', CUBE_METRICS)
+    
+    def get_theme_data(self, top_n=5):
+        """Aggregate by content theme, top_n by engagement rate (see utils.data_processing.get_theme_data)."""
+        theme_data = self._group_data('content_theme', ['views'])
+        return theme_data.iloc[top_k_indices(theme_data['engagement_rate'].values, top_n)].reset_index(drop=True)
+    
+    def get_time_series_data(self):
+        """Aggregate by date (see utils.data_processing.get_time_series_data)."""
+        time_series = self._group_data('date', CUBE_METRICS).drop(columns='engagement_rate')
+        time_series = time_series.sort_values('date', ignore_index=True)
+        time_series['engagement_rate'] = engagement_rate(time_series)
+        return time_series
+    
+    def results(self, top_n=5):
+        """
+        Return everything the dashboard shows, like utils.data_processing.dashboard_data.
+        
+        Returns:
+        --------
+        dict or None
+            'kpis', 'platform_data', 'theme_data', 'time_series' and 'display_df',
+            or None when no rows were added
+        """
+        if self.posts == 0:
+            return None
+        return {
+            'kpis': self.calculate_kpis(),
+            'platform_data': self.get_platform_data(),
+            'theme_data': self.get_theme_data(top_n),
+            'time_series': self.get_time_series_data(),
+            'display_df': prepare_display_data(self.recent, self.recent_rows)
+        }
+
+def stream_csv_aggregates(path, start_date=None, end_date=None, platforms=None, regions=None, themes=None,
+                          chunk_size=CSV_CHUNK_ROWS, top_n=5):
+    """
+    Compute the dashboard results of a CSV file without loading it whole.
+    
+    The file is parsed chunk_size rows at a time; each chunk is filtered and
+    folded into an EngagementAggregate, then dropped, so memory is bounded by
+    the chunk size whatever the size of the file.
+    
+    Parameters:
+    -----------
+    path : str
+        Path to the CSV file
+    start_date, end_date, platforms, regions, themes
+        Filters, as for utils.data_processing.filter_dataframe
+    chunk_size : int
+        Rows parsed at a time
+    top_n : int
+        Number of top themes to return
+    
+    Returns:
+    --------
+    dict or None
+        As returned by EngagementAggregate.results
+    """
+    aggregate = EngagementAggregate()
+    for chunk in iter_csv_chunks(path, chunk_size):
+        aggregate.add(filter_dataframe(chunk, start_date, end_date, platforms, regions, themes))
+    return aggregate.results(top_n)
+
+def date_shards(start_date, end_date, num_shards):
+    """Split a date range into up to num_shards contiguous (start, end) ranges of whole days."""
+    num_days = (end_date - start_date).days + 1
+    if num_days <= 0:
+        return []
+    bounds = np.linspace(0, num_days, min(num_shards, num_days) + 1).astype(int)
+    return [(start_date + timedelta(days=int(first)), start_date + timedelta(days=int(stop) - 1))
+            for first, stop in zip(bounds[:-1], bounds[1:])]
+
+def shard_rows(df, column, index, num_shards):
+    """
+    Select the rows of one shard out of num_shards by hashing a dimension column.
+    
+    Values are assigned by CRC-32, so every process agrees on the shard of a
+    value, including values outside the schema; rows missing the value go to shard 0.
+    """
+    codes, categories = dimension_codes(df[column])
+    owners = np.array([zlib.crc32(str(value).encode()) % num_shards for value in categories] + [0], dtype=np.int64)
+    keep = owners[codes] == index
+    return df if keep.all() else df[keep]
+
+def aggregate_shard(base_path, filters, rows=None):
+    """
+    Compute the partial aggregate of one shard of a dataset; run by aggregate_sharded's workers.
+    
+    A shard reads only its own part of the files: the partitions within the
+    date range of its filters, or a range of rows of a single-file dataset.
+    
+    Parameters:
+    -----------
+    base_path : str
+        Dataset path without extension (see data.data_loader.dataset_paths)
+    filters : dict
+        Filters, as for utils.data_processing.filter_dataframe. Partitioned
+        datasets only read the partitions within the date range.
+    rows : tuple, optional
+        (start, stop) part of a single-file dataset: row positions in an Arrow
+        file, byte offsets of whole lines in a CSV file (see
+        data.storage.csv_line_ranges). Without it the whole dataset is read.
+    
+    Returns:
+    --------
+    EngagementAggregate
+        Aggregate of the shard's rows
+    """
+    kind, path = resolve_source(base_path)
+    if kind == 'partitioned' or rows is None:
+        chunks = [load_dataset(base_path, filters.get('start_date'), filters.get('end_date'), compact=False)]
+    elif kind == 'arrow':
+        # Every worker maps the same file, so the pages are shared through the OS page cache
+        chunks = [read_memory_mapped(path).iloc[rows[0]:rows[1]]]
+    else:
+        chunks = iter_csv_range(path, *rows)
+    
+    aggregate = EngagementAggregate()
+    for chunk in chunks:
+        aggregate.add(filter_dataframe(chunk, **filters))
+    return aggregate
+
+def aggregate_region_shard(df, filters, shard):
+    """
+    Compute the partial aggregate of the rows of a loaded frame that shard_rows assigns to a shard.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The loaded data
+    filters : dict
+        Filters, as for utils.data_processing.filter_dataframe
+    shard : tuple
+        (column, index, num_shards), as for shard_rows
+    
+    Returns:
+    --------
+    EngagementAggregate
+        Aggregate of the shard's matching rows
+    """
+    return EngagementAggregate.from_frame(filter_dataframe(shard_rows(df, *shard), **filters))
+
+def _set_shared_frame(df):
+    """Worker initializer: keep the frame inherited from the parent process."""
+    global _shared_frame
+    _shared_frame = df
+
+def _aggregate_shared_shard(filters, shard):
+    """aggregate_region_shard over the frame inherited from the parent process."""
+    return aggregate_region_shard(_shared_frame, filters, shard)
+
+def _storage_shards(base_path, filters, num_shards):
+    """Split a dataset into up to num_shards aggregate_shard tasks that read disjoint parts of the files."""
+    kind, path = resolve_source(base_path)
+    if kind == 'partitioned':
+        start_date, end_date = filters['start_date'], filters['end_date']
+        if start_date is None or end_date is None:
+            first_day, last_day = partition_date_bounds(path)
+            start_date, end_date = start_date or first_day, end_date or last_day
+        return [(base_path, dict(filters, start_date=first, end_date=last), None)
+                for first, last in date_shards(start_date, end_date, num_shards)]
+    if kind == 'arrow':
+        bounds = np.linspace(0, len(read_memory_mapped(path)), num_shards + 1).astype(int)
+        return [(base_path, filters, (int(start), int(stop)))
+                for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    return [(base_path, filters, byte_range) for byte_range in csv_line_ranges(path, num_shards)]
+
+def aggregate_sharded(base_path=DEFAULT_DATA_PATH, start_date=None, end_date=None, platforms=None, regions=None,
+                      themes=None, shard_by='date', workers=None, top_n=5):
+    """
+    Compute the dashboard results in a process pool and merge the partial aggregates.
+    
+    Sharding by date has every worker read a disjoint part of the files: a
+    contiguous date range of a partitioned dataset, of which only the matching
+    partitions are read, or a contiguous range of rows of a single file, which
+    is kept in timestamp order. These shards are described by plain arguments
+    and return picklable partials, so the same protocol can run on other
+    executors. Regions are spread over every file, so sharding by region loads
+    the data once in this process and forks workers that inherit it, each
+    keeping the regions hashed to it (see shard_rows); where fork is not
+    available the region shards run in this process.
+    
+    Parameters:
+    -----------
+    base_path : str
+        Dataset path without extension; the dataset must exist
+    start_date, end_date, platforms, regions, themes
+        Filters, as for utils.data_processing.filter_dataframe
+    shard_by : str
+        One of SHARD_KEYS
+    workers : int, optional
+        Number of shards and worker processes (default: os.cpu_count())
+    top_n : int
+        Number of top themes to return
+    
+    Returns:
+    --------
+    dict or None
+        As returned by EngagementAggregate.results
+    """
+    workers = workers or os.cpu_count() or 1
+    filters = {'start_date': start_date, 'end_date': end_date, 'platforms': platforms,
+               'regions': regions, 'themes': themes}
+    if shard_by == 'date':
+        tasks = _storage_shards(base_path, filters, workers)
+        if workers == 1 or len(tasks) <= 1:
+            partials = [aggregate_shard(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                partials = list(executor.map(aggregate_shard, *zip(*tasks)))
+    elif shard_by == 'region':
+        df = load_dataset(base_path, start_date, end_date, compact=False)
+        tasks = [(filters, ('region', index, workers)) for index in range(workers)]
+        if workers == 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            partials = [aggregate_region_shard(df, *task) for task in tasks]
+        else:
+            # Forked workers inherit the frame through the initializer's arguments instead of a pickled copy
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                                     initializer=_set_shared_frame, initargs=(df,)) as executor:
+                partials = list(executor.map(_aggregate_shared_shard, *zip(*tasks)))
+    else:
+        raise ValueError(f"Unknown shard key '{shard_by}'; expected one of {SHARD_KEYS}")
+    return EngagementAggregate.merge_all(partials).results(top_n)
@@ -0,0 +1,170 @@
+"""
+Benchmark and profiling helpers for the Brut Engagement Dashboard.
+Measures the time and memory the dashboard's data processing takes.
+
+Run as: python -m utils.benchmarks [dataset base path]
+    or: python -m utils.benchmarks --kernels [--sizes 1000 1000000 50000000]
+"""
+
+import time
+import tracemalloc
+
+from data.schema import DIMENSIONS, add_derived_metrics, frame_bytes
+from .cube import EngagementCube
+from .data_processing import dashboard_data, get_platform_data, get_theme_data, get_time_series_data
+from .indexing import TimeIndex
+
+# Row counts of the kernel benchmark
+KERNEL_BENCHMARK_SIZES = [1_000, 1_000_000, 50_000_000]
+
+def measure_peak_memory(func, *args, **kwargs):
+    """
+    Call a function and measure the memory it allocates, with tracemalloc.
+    
+    NumPy and pandas report their array buffers to tracemalloc, so the peak
+    covers the frames and arrays created during the call.
+    
+    Returns:
+    --------
+    tuple
+        (result, peak_bytes, seconds) where peak_bytes is the highest memory
+        allocated during the call beyond what was allocated before it
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return result, peak, seconds
+
+def profile_render(df, **filters):
+    """
+    Profile the data processing of one dashboard render.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Loaded data frame, as returned by data.DataLoader.load
+    **filters
+        Filters passed to utils.data_processing.dashboard_data
+    
+    Returns:
+    --------
+    dict
+        Size of the loaded frame, and the peak memory and time of building the
+        index and the cube and of one render from the cube, from the index
+        alone and from the bare frame
+    """
+    index, index_peak, index_seconds = measure_peak_memory(TimeIndex, df, DIMENSIONS)
+    cube, cube_peak, cube_seconds = measure_peak_memory(EngagementCube, index.df)
+    _, cube_render_peak, cube_render_seconds = measure_peak_memory(dashboard_data, index, cube=cube, **filters)
+    _, indexed_peak, indexed_seconds = measure_peak_memory(dashboard_data, index, **filters)
+    _, frame_peak, frame_seconds = measure_peak_memory(dashboard_data, df, **filters)
+    return {
+        'frame_bytes': frame_bytes(df),
+        'index_peak_bytes': index_peak,
+        'index_seconds': index_seconds,
+        'cube_peak_bytes': cube_peak,
+        'cube_seconds': cube_seconds,
+        'cube_render_peak_bytes': cube_render_peak,
+        'cube_render_seconds': cube_render_seconds,
+        'render_peak_bytes': indexed_peak,
+        'render_seconds': indexed_seconds,
+        'unindexed_render_peak_bytes': frame_peak,
+        'unindexed_render_seconds': frame_seconds
+    }
+
+def _pandas_aggregates(df):
+    """The platform, theme and daily aggregates with pandas groupby, for comparison."""
+    platform_data = df.groupby('platform', observed=True).agg({
+        'views': 'sum', 'likes': 'sum', 'comments': 'sum', 'shares': 'sum', 'engagement_rate': 'mean'
+    }).reset_index()
+    theme_data = df.groupby('content_theme', observed=True).agg({
+        'views': 'sum', 'engagement_rate': 'mean'
+    }).reset_index().sort_values('engagement_rate', ascending=False).head(5)
+    days = df['timestamp'].values.astype('datetime64[D]')
+    time_series = df[['views', 'likes', 'comments', 'shares']].groupby(days).sum()
+    return platform_data, theme_data, time_series
+
+def _kernel_aggregates(df):
+    """The platform, theme and daily aggregates with the bincount kernels."""
+    return get_platform_data(df), get_theme_data(df), get_time_series_data(df)
+
+def _synthetic_frame(num_records, seed=42):
+    """Generate a frame of synthetic posts sorted by timestamp, with the derived metrics, like loaded data."""
+    from data.data_generator import iter_synthetic_chunks
+    from data.ingest import concat_frames
+    
+    return add_derived_metrics(TimeIndex(concat_frames(list(iter_synthetic_chunks(num_records, seed=seed)))).df)
+
+def benchmark_kernels(sizes=KERNEL_BENCHMARK_SIZES, repeats=3, seed=42):
+    """
+    Time the bincount aggregation kernels against pandas groupby.
+    
+    Both compute the platform, theme and daily aggregates of synthetic frames.
+    
+    Parameters:
+    -----------
+    sizes : list
+        Row counts to benchmark
+    repeats : int
+        Runs per measurement; the fastest is kept
+    
+    Returns:
+    --------
+    list
+        One dict per size with 'rows', 'pandas_seconds', 'kernel_seconds' and 'speedup'
+    """
+    results = []
+    for size in sizes:
+        df = _synthetic_frame(size, seed)
+        timings = {}
+        for name, func in [('pandas', _pandas_aggregates), ('kernel', _kernel_aggregates)]:
+            runs = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                func(df)
+                runs.append(time.perf_counter() - start)
+            timings[name] = min(runs)
+        results.append({
+            'rows': size,
+            'pandas_seconds': timings['pandas'],
+            'kernel_seconds': timings['kernel'],
+            'speedup': timings['pandas'] / timings['kernel']
+        })
+        del df
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    from data import DataLoader
+    
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data processing.")
+    parser.add_argument("path", nargs="?", default=None, help="Dataset base path to profile a render on")
+    parser.add_argument("--kernels", action="store_true",
+                        help="Benchmark the aggregation kernels against pandas instead")
+    parser.add_argument("--sizes", type=int, nargs="+", default=KERNEL_BENCHMARK_SIZES,
+                        help="Row counts for --kernels")
+    args = parser.parse_args()
+    
+    if args.kernels:
+        print(f"{'rows':>12} {'pandas':>10} {'kernels':>10} {'speedup':>8}")
+        for result in benchmark_kernels(args.sizes):
+            print(f"{result['rows']:>12,} {result['pandas_seconds']:>9.4f}s "
+                  f"{result['kernel_seconds']:>9.4f}s {result['speedup']:>7.1f}x")
+    else:
+        loader = DataLoader(args.path) if args.path else DataLoader()
+        df = loader.load()
+        for name, value in profile_render(df).items():
+            if name.endswith('bytes'):
+                print(f"{name:32} {value / 1e6:10.1f} MB")
+            else:
+                print(f"{name:32} {value:10.3f} s")
@@ -0,0 +1,129 @@
+"""
+Result caching for the Brut Engagement Dashboard.
+Keeps recently computed filter results and aggregates in a bounded LRU cache,
+keyed by a normalized filter spec.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+
+def filter_key(start_date=None, end_date=None, platforms=None, regions=None, themes=None):
+    """
+    Return a hashable key for a filter spec, independent of selection order.
+    
+    Takes the same arguments as utils.data_processing.filter_dataframe. Selections
+    are sorted and deduplicated; None (no filter) and an empty selection stay distinct.
+    
+    Returns:
+    --------
+    tuple
+        (start_date, end_date, platforms, regions, themes) with tuple selections
+    """
+    def selection(values):
+        return None if values is None else tuple(sorted(set(values), key=str))
+    
+    return (start_date, end_date, selection(platforms), selection(regions), selection(themes))
+
+def result_bytes(value):
+    """Estimate the memory held by a cached result (frames, arrays, and containers of them)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """
+    Thread-safe LRU cache bounded by entry count and total size.
+    
+    Least recently used entries are evicted until both limits hold; a single
+    result larger than max_bytes is returned but never stored.
+    
+    Parameters:
+    -----------
+    max_entries : int
+        Maximum number of cached results
+    max_bytes : int
+        Maximum total size of the cached results, as estimated by result_bytes
+    """
+    
+    def __init__(self, max_entries=32, max_bytes=256 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, key):
+        return key in self._entries
+    
+    def get(self, key, default=None):
+        """Return a cached result (marking it recently used), or default."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+    
+    def put(self, key, value):
+        """Cache a result, evicting least recently used entries as needed."""
+        size = result_bytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self.nbytes -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
+    
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached result for key, calling compute() and caching it on a miss.
+        
+        compute runs outside the lock, so concurrent misses on one key may both compute.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+    
+    def clear(self):
+        """Drop every cached result (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+    
+    def stats(self):
+        """Return the hit, miss and eviction counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.nbytes
+            }
@@ -0,0 +1,180 @@
+"""
+Pre-aggregated data cube for the Brut Engagement Dashboard.
+Sums the engagement metrics per day, platform, region and content theme once,
+so dashboard queries cost the size of the cube rather than the number of posts.
+"""
+
+import pandas as pd
+import numpy as np
+
+from data.schema import engagement_rate
+from .kernels import day_axis, day_ordinals, day_slice, dimension_codes, group_counts, group_sums, top_k_indices
+
+# Cube dimensions after the day axis, in axis order
+CUBE_DIMENSIONS = ['platform', 'region', 'content_theme']
+
+# Metrics summed in every cell, next to the post count and the engagement-rate sum
+CUBE_METRICS = ['views', 'likes', 'comments', 'shares']
+
+class EngagementCube:
+    """
+    Dense day x platform x region x content theme cube of engagement sums.
+    
+    Each cell holds the post count, the sum of every metric and the sum of the
+    per-post engagement rates, which is all the dashboard aggregates need: sums
+    add up across cells, and means are sums divided by counts. At daily
+    granularity 180 days make 180 x 5 x 7 x 10 = 63,000 cells whatever the
+    number of posts. Rows with a missing dimension value are left out.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame with engagement metrics
+    """
+    
+    def __init__(self, df):
+        cell, self.first_day, num_days = day_ordinals(df['timestamp'].values)
+        valid = np.ones(len(df), dtype=bool)
+        self.categories = {}
+        shape = [num_days]
+        for column in CUBE_DIMENSIONS:
+            codes, categories = dimension_codes(df[column])
+            self.categories[column] = categories
+            valid &= codes >= 0
+            cell = cell * len(categories) + codes
+            shape.append(len(categories))
+        self.shape = tuple(shape)
+        
+        # Rows with a missing dimension value get a negative key, which the kernels skip
+        cell[~valid] = -1
+        size = int(np.prod(self.shape))
+        self.counts = group_counts(cell, size).reshape(self.shape)
+        self.sums = {column: group_sums(cell, df[column].values, size).reshape(self.shape)
+                     for column in CUBE_METRICS}
+        rates = df['engagement_rate'].values if 'engagement_rate' in df.columns else engagement_rate(df).values
+        self.rate_sums = group_sums(cell, rates.astype(np.float64), size).reshape(self.shape)
+    
+    @property
+    def nbytes(self):
+        """Memory held by the cube's arrays."""
+        return self.counts.nbytes + self.rate_sums.nbytes + sum(sums.nbytes for sums in self.sums.values())
+    
+    @property
+    def days(self):
+        """Every day of the cube's day axis, as datetime.date objects."""
+        return day_axis(self.first_day, self.shape[0])
+    
+    def query(self, start_date=None, end_date=None, platforms=None, regions=None, themes=None):
+        """
+        Select the cells matching dashboard filters.
+        
+        Takes the same arguments as utils.data_processing.filter_dataframe.
+        
+        Returns:
+        --------
+        CubeSlice
+            The selected cells, which the dashboard aggregates are computed from
+        """
+        days = day_slice(self.first_day, self.shape[0], start_date, end_date)
+        positions = []
+        for column, selected in zip(CUBE_DIMENSIONS, (platforms, regions, themes)):
+            categories = self.categories[column]
+            if selected is None or len(selected) == 0:
+                positions.append(np.arange(len(categories)))
+            else:
+                wanted = set(selected)
+                positions.append(np.array([i for i, value in enumerate(categories) if value in wanted], dtype=np.intp))
+        
+        def select(values):
+            values = values[days]
+            for axis, indices in enumerate(positions, start=1):
+                if len(indices) != values.shape[axis]:
+                    values = np.take(values, indices, axis=axis)
+            return values
+        
+        return CubeSlice(
+            counts=select(self.counts),
+            sums={column: select(sums) for column, sums in self.sums.items()},
+            rate_sums=select(self.rate_sums),
+            days=self.days[days],
+            categories=self.categories,
+            positions=dict(zip(CUBE_DIMENSIONS, positions))
+        )
+
+class CubeSlice:
+    """
+    Cells selected from an EngagementCube, with the dashboard aggregates.
+    
+    Results match the utils.data_processing functions of the same name on the
+    filtered rows, with int64 metric sums.
+    """
+    
+    def __init__(self, counts, sums, rate_sums, days, categories, positions):
+        self.counts = counts
+        self.sums = sums
+        self.rate_sums = rate_sums
+        self.days = days
+        # Every category of each dimension, and the ones along each selected axis
+        self.categories = categories
+        self.positions = positions
+    
+    @property
+    def total_posts(self):
+        """Number of posts in the selected cells."""
+        return int(self.counts.sum())
+    
+    def _totals(self, axis):
+        """Counts, metric sums and rate sums totalled over every axis but one."""
+        other = tuple(i for i in range(self.counts.ndim) if i != axis)
+        return (self.counts.sum(axis=other),
+                {column: sums.sum(axis=other) for column, sums in self.sums.items()},
+                self.rate_sums.sum(axis=other))
+    
+    def calculate_kpis(self):
+        """Return the KPIs (see utils.data_processing.calculate_kpis)."""
+        posts = self.total_posts
+        return {
+            'total_views': int(self.sums['views'].sum()),
+            'avg_likes': int(self.sums['likes'].sum() / posts),
+            'avg_engagement': self.rate_sums.sum() / posts,
+            'total_posts': posts
+        }
+    
+    def _dimension_data(self, column, metrics):
+        """Per-value metric sums and mean engagement rate for a dimension, for values with posts."""
+        counts, sums, rate_sums = self._totals(1 + CUBE_DIMENSIONS.index(column))
+        present = counts > 0
+        codes = self.positions[column][present]
+        data = {column: pd.Categorical.from_codes(codes, categories=self.categories[column])}
+        for metric in metrics:
+            data[metric] = sums[metric][present]
+        data['engagement_rate'] = rate_sums[present] / counts[present]
+        return pd.DataFrame(data)
+    
+    def get_platform_data(self):
+        """Aggregate by platform (see utils.data_processing.get_platform_data)."""
+        return self._dimension_data('platform', ['views', 'likes', 'comments', 'shares'])
+    
+    def get_theme_data(self, top_n=5):
+        """Aggregate by content theme, top_n by engagement rate (see utils.data_processing.get_theme_data)."""
+        theme_data = self._dimension_data('content_theme', ['views'])
+        return theme_data.iloc[top_k_indices(theme_data['engagement_rate'].values, top_n)]
+    
+    def aggregates(self, top_n=5):
+        """Return the KPIs and the platform, theme and daily aggregates together."""
+        return {
+            'kpis': self.calculate_kpis(),
+            'platform_data': self.get_platform_data(),
+            'theme_data': self.get_theme_data(top_n),
+            'time_series': self.get_time_series_data()
+        }
+    
+    def get_time_series_data(self):
+        """Aggregate by date (see utils.data_processing.get_time_series_data)."""
+        counts, sums, _ = self._totals(0)
+        present = counts > 0
+        time_series = pd.DataFrame({'date': [day for day, keep in zip(self.days, present) if keep]})
+        for metric in ['views', 'likes', 'comments', 'shares']:
+            time_series[metric] = sums[metric][present]
+        time_series['engagement_rate'] = engagement_rate(time_series)
+        return time_series
@@ -1,12 +1,21 @@
 """
 Data processing utilities for the Brut Engagement Dashboard.
 Contains functions for filtering, aggregating, and calculating metrics.
+
+None of these functions copy or modify the frame they are given: filtering
+returns slices or the selected rows only, and aggregations read the columns
+they need. Their results may share memory with the input, so treat both as
+read-only.
 """
 
-import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from data.schema import COLUMNS, engagement_rate
+from .cube import EngagementCube
+from .indexing import TimeIndex, date_range_mask, date_range_slice
+from .kernels import aggregate_by_dimension, aggregate_by_period, top_k_by_dimension
+
 def calculate_kpis(df):
     """
     Calculate key performance indicators from the data.
@@ -21,14 +30,13 @@ def calculate_kpis(df):
     dict
         Dictionary containing calculated KPIs
     """
-    # Calculate engagement rate for each row
-    if 'engagement_rate' not in df.columns:
-        df['engagement_rate'] = ((df['likes'] + df['comments'] + df['shares']) / df['views'] * 100).round(2)
+    # Engagement rate for each row, computed (without storing it) if the frame lacks it
+    rates = df['engagement_rate'] if 'engagement_rate' in df.columns else engagement_rate(df)
     
     # Calculate KPIs
     total_views = df['views'].sum()
     avg_likes = int(df['likes'].mean())
-    avg_engagement = df['engagement_rate'].mean()
+    avg_engagement = rates.mean()
     total_posts = len(df)
     
     return {
@@ -44,8 +52,10 @@ def filter_dataframe(df, start_date=None, end_date=None, platforms=None, regions
     
     Parameters:
     -----------
-    df : pandas.DataFrame
-        Input data frame to filter
+    df : pandas.DataFrame or utils.indexing.TimeIndex
+        Input data frame to filter. Sorted timestamps (or a TimeIndex) are
+        filtered by binary search; unsorted ones by comparing every row. A
+        TimeIndex with bitmaps also answers the dimension filters.
     start_date : datetime.date, optional
         Start date for filtering
     end_date : datetime.date, optional
@@ -60,29 +70,32 @@ def filter_dataframe(df, start_date=None, end_date=None, platforms=None, regions
     Returns:
     --------
     pandas.DataFrame
-        Filtered dataframe
+        Filtered dataframe: a slice of the input when only dates are filtered,
+        otherwise a new frame holding just the selected rows
     """
-    filtered_df = df.copy()
-    
-    # Date filtering
-    if start_date is not None:
-        filtered_df = filtered_df[filtered_df['timestamp'].dt.date >= start_date]
-    if end_date is not None:
-        filtered_df = filtered_df[filtered_df['timestamp'].dt.date <= end_date]
+    selections = {'platform': platforms, 'region': regions, 'content_theme': themes}
     
-    # Platform filtering
-    if platforms is not None and len(platforms) > 0:
-        filtered_df = filtered_df[filtered_df['platform'].isin(platforms)]
+    # Date filtering, as a positional slice when the timestamps are sorted
+    if isinstance(df, TimeIndex):
+        rows = df.slice(start_date, end_date)
+        filtered_df = df.df.iloc[rows]
+        if df.bitmaps is not None:
+            # Dimension filtering with the precomputed bitmaps
+            mask = df.bitmaps.mask(selections, rows)
+            return filtered_df if mask.all() else filtered_df[mask]
+    elif df['timestamp'].is_monotonic_increasing:
+        filtered_df = df.iloc[date_range_slice(df['timestamp'].values, start_date, end_date)]
+    else:
+        filtered_df = df[date_range_mask(df['timestamp'].values, start_date, end_date)]
     
-    # Region filtering
-    if regions is not None and len(regions) > 0:
-        filtered_df = filtered_df[filtered_df['region'].isin(regions)]
+    # Platform, region and theme filtering, combined into one mask so rows are selected once
+    mask = None
+    for column, selected in selections.items():
+        if selected is not None and len(selected) > 0:
+            matches = filtered_df[column].isin(selected).values
+            mask = matches if mask is None else mask & matches
     
-    # Theme filtering
-    if themes is not None and len(themes) > 0:
-        filtered_df = filtered_df[filtered_df['content_theme'].isin(themes)]
-    
-    return filtered_df
+    return filtered_df if mask is None or mask.all() else filtered_df[mask]
 
 def get_platform_data(df):
     """
@@ -98,13 +111,8 @@ def get_platform_data(df):
     pandas.DataFrame
         Aggregated data by platform
     """
-    return df.groupby('platform').agg({
-        'views': 'sum',
-        'likes': 'sum',
-        'comments': 'sum',
-        'shares': 'sum',
-        'engagement_rate': 'mean'
-    }).reset_index()
+    return aggregate_by_dimension(df, 'platform', sums=['views', 'likes', 'comments', 'shares'],
+                                  means=['engagement_rate'])
 
 def get_theme_data(df, top_n=5):
     """
@@ -122,15 +130,35 @@ def get_theme_data(df, top_n=5):
     pandas.DataFrame
         Aggregated data by theme, sorted by engagement rate
     """
-    theme_data = df.groupby('content_theme').agg({
-        'views': 'sum',
-        'engagement_rate': 'mean'
-    }).reset_index()
+    # Select the top N by engagement rate without sorting every theme
+    return top_k_by_dimension(df, 'content_theme', top_n, 'engagement_rate', sums=['views'], means=['engagement_rate'])
+
+def get_top_k_data(df, column, top_n=5, by='engagement_rate'):
+    """
+    Aggregate data by any dimension and keep the top values.
     
-    # Sort by engagement rate and get top N
-    return theme_data.sort_values('engagement_rate', ascending=False).head(top_n)
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame with engagement metrics
+    column : str
+        Dimension to rank, e.g. 'content_theme', 'region', 'platform' or a
+        high-cardinality column such as a post or creator id
+    top_n : int, optional
+        Number of top values to return
+    by : str, optional
+        'engagement_rate' (mean per value) or a metric ('views', 'likes',
+        'comments', 'shares'; summed per value)
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        The top_n values, best first, with their metric sums and mean engagement rate
+    """
+    return top_k_by_dimension(df, column, top_n, by, sums=['views', 'likes', 'comments', 'shares'],
+                              means=['engagement_rate'])
 
-def get_time_series_data(df):
+def get_time_series_data(df, period='day'):
     """
     Aggregate data by date for time series visualization.
     
@@ -138,26 +166,19 @@ def get_time_series_data(df):
     -----------
     df : pandas.DataFrame
         Input data frame with engagement metrics
+    period : str, optional
+        'hour', 'day', 'week' (ISO, from Monday) or 'month'
     
     Returns:
     --------
     pandas.DataFrame
-        Aggregated data by date
+        Aggregated data by period, labelled by the period start in 'date'
     """
-    # Create a copy with date column
-    time_data = df.copy()
-    time_data['date'] = time_data['timestamp'].dt.date
-    
-    # Group by date
-    time_series = time_data.groupby('date').agg({
-        'views': 'sum',
-        'likes': 'sum',
-        'comments': 'sum',
-        'shares': 'sum'
-    }).reset_index()
+    # Group by period ordinal
+    time_series = aggregate_by_period(df, period, sums=['views', 'likes', 'comments', 'shares'])
     
     # Calculate engagement rate
-    time_series['engagement_rate'] = ((time_series['likes'] + time_series['comments'] + time_series['shares']) / time_series['views'] * 100).round(2)
+    time_series['engagement_rate'] = engagement_rate(time_series)
     
     return time_series
 
@@ -177,8 +198,110 @@ def prepare_display_data(df, n_rows=10):
     pandas.DataFrame
         Processed data for display
     """
-    display_df = df.copy()
-    display_df['timestamp'] = display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
-    display_df = display_df.sort_values('timestamp', ascending=False)
+    # Select the most recent rows first, then format only those
+    if df['timestamp'].is_monotonic_increasing:
+        display_df = df.iloc[::-1].head(n_rows)
+    else:
+        display_df = df.sort_values('timestamp', ascending=False, kind='stable').head(n_rows)
+    
+    return display_df.assign(timestamp=display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M'))
+
+def latest_rows(index, n_rows=10, start_date=None, end_date=None, platforms=None, regions=None, themes=None):
+    """
+    Return the n_rows most recent rows matching the filters, without filtering the whole frame.
+    
+    Blocks of rows are checked against the bitmaps backwards from the end of
+    the date range, doubling in size, until enough rows match.
+    
+    Parameters:
+    -----------
+    index : utils.indexing.TimeIndex
+        Time index with bitmaps over the data
+    n_rows : int, optional
+        Number of rows to return
+    start_date, end_date, platforms, regions, themes
+        Filters, as for filter_dataframe
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        Matching rows in timestamp order (the last n_rows of filter_dataframe's result)
+    """
+    rows = index.slice(start_date, end_date)
+    selections = {'platform': platforms, 'region': regions, 'content_theme': themes}
+    found = []
+    count = 0
+    stop = rows.stop
+    block = max(1024, n_rows * 64)
+    while stop > rows.start and count < n_rows:
+        start = max(rows.start, stop - block)
+        positions = np.flatnonzero(index.bitmaps.mask(selections, slice(start, stop))) + start
+        found.append(positions)
+        count += len(positions)
+        stop = start
+        block *= 2
+    positions = np.sort(np.concatenate(found))[-n_rows:] if found else np.array([], dtype=np.intp)
+    return index.df.iloc[positions]
+
+def aggregate_dashboard(df, top_n=5):
+    """
+    Compute the KPIs and the platform, theme and daily aggregates in one pass.
+    
+    Rather than one groupby per chart and a reduction per KPI, each row gets a
+    single integer key (day, platform, region, theme) and every column is
+    summed once per key (see utils.cube.EngagementCube). All four results are
+    totals of those few cells.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame with engagement metrics (e.g. filter_dataframe's result)
+    top_n : int, optional
+        Number of top themes to return
+    
+    Returns:
+    --------
+    dict
+        'kpis', 'platform_data', 'theme_data' and 'time_series', as returned by
+        calculate_kpis, get_platform_data, get_theme_data and get_time_series_data
+    """
+    return EngagementCube(df).query().aggregates(top_n)
+
+def dashboard_data(df, start_date=None, end_date=None, platforms=None, regions=None, themes=None, cube=None):
+    """
+    Compute everything the dashboard shows for one set of filters.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame or utils.indexing.TimeIndex
+        Input data frame (see filter_dataframe)
+    start_date, end_date, platforms, regions, themes
+        Filters, as for filter_dataframe
+    cube : utils.cube.EngagementCube, optional
+        Cube built from the same data. The aggregates are then read from the cube
+        and only the displayed rows are taken from df, which must be a TimeIndex
+        with bitmaps.
+    
+    Returns:
+    --------
+    dict or None
+        'kpis', 'platform_data', 'theme_data', 'time_series' and 'display_df',
+        or None when no rows match
+    """
+    if cube is not None:
+        cells = cube.query(start_date, end_date, platforms, regions, themes)
+        if cells.total_posts == 0:
+            return None
+        results = cells.aggregates()
+        recent = latest_rows(df, 10, start_date, end_date, platforms, regions, themes)
+    else:
+        recent = filter_dataframe(df, start_date, end_date, platforms, regions, themes)
+        if recent.empty:
+            return None
+        results = aggregate_dashboard(recent)
     
-    return display_df.head(n_rows)
\ No newline at end of file
+    if 'engagement_rate' not in recent.columns:
+        # Data loaded through data.DataLoader has the column; otherwise only the displayed rows get it
+        recent = recent.assign(engagement_rate=engagement_rate(recent).astype(np.float32))
+    results['display_df'] = prepare_display_data(recent[COLUMNS + ['engagement_rate']])
+    return results
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Index structures for the Brut Engagement Dashboard.
+Finds the rows of a date range by binary search on sorted timestamps and the rows
+of dimension selections with precomputed bitmaps, instead of comparing every row.
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import timedelta
+
+def _day_start(day):
+    """Return midnight of a date as a datetime64[ns] value."""
+    return np.datetime64(day, 'D').astype('datetime64[ns]')
+
+def date_range_slice(timestamps, start_date=None, end_date=None):
+    """
+    Find the rows of a sorted timestamp array that fall within a date range.
+    
+    Parameters:
+    -----------
+    timestamps : numpy.ndarray
+        datetime64[ns] values sorted in increasing order
+    start_date : datetime.date, optional
+        First day to include
+    end_date : datetime.date, optional
+        Last day to include (up to 23:59:59.999999999)
+    
+    Returns:
+    --------
+    slice
+        Positions of the matching rows, found with two binary searches
+    """
+    start = 0
+    stop = len(timestamps)
+    if start_date is not None:
+        start = int(np.searchsorted(timestamps, _day_start(start_date), side='left'))
+    if end_date is not None:
+        stop = int(np.searchsorted(timestamps, _day_start(end_date + timedelta(days=1)), side='left'))
+    return slice(start, max(start, stop))
+
+def date_range_mask(timestamps, start_date=None, end_date=None):
+    """
+    Boolean mask of the timestamps within a date range, for unsorted data.
+    
+    Compares datetime64 values directly, without building Python date objects.
+    """
+    mask = np.ones(len(timestamps), dtype=bool)
+    if start_date is not None:
+        mask &= timestamps >= _day_start(start_date)
+    if end_date is not None:
+        mask &= timestamps < _day_start(end_date + timedelta(days=1))
+    return mask
+
+class BitmapIndex:
+    """
+    One packed bitmap per dimension value, built once per frame.
+    
+    Each bitmap has one bit per row (set where the row has that value), so a
+    dimension costs one byte per 8 rows per value. Selections are answered with
+    bitwise operations: OR within a dimension, AND across dimensions.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame
+    columns : iterable
+        Dimension columns to index
+    """
+    
+    def __init__(self, df, columns):
+        self.size = len(df)
+        self.bitmaps = {}
+        self.values = {}
+        for column in columns:
+            values = df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, categories = values.cat.codes.values, values.cat.categories
+            else:
+                codes, categories = pd.factorize(values)
+            
+            # Values present in the frame, in order of first appearance like Series.unique()
+            present, first_row = np.unique(codes[codes >= 0], return_index=True)
+            present = present[np.argsort(first_row)]
+            self.values[column] = [categories[code] for code in present]
+            self.bitmaps[column] = {categories[code]: np.packbits(codes == code) for code in present}
+    
+    def mask(self, selections, rows=slice(None)):
+        """
+        Return the boolean mask of the rows matching dimension selections.
+        
+        Parameters:
+        -----------
+        selections : dict
+            Selected values for each indexed column; None or an empty list
+            leaves that column unfiltered, like filter_dataframe
+        rows : slice
+            Rows to build the mask for (e.g. a TimeIndex date slice); only the
+            bitmap bytes covering them are read
+        
+        Returns:
+        --------
+        numpy.ndarray
+            Boolean mask with one entry per row of rows
+        """
+        start, stop, _ = rows.indices(self.size)
+        first_byte, last_byte = start // 8, -(-stop // 8)
+        combined = None
+        for column, selected in selections.items():
+            if selected is None or len(selected) == 0:
+                continue
+            bitmaps = self.bitmaps[column]
+            within = np.zeros(last_byte - first_byte, dtype=np.uint8)
+            for value in selected:
+                if value in bitmaps:
+                    within |= bitmaps[value][first_byte:last_byte]
+            if combined is None:
+                combined = within
+            else:
+                combined &= within
+        
+        if combined is None:
+            return np.ones(stop - start, dtype=bool)
+        offset = start - first_byte * 8
+        return np.unpackbits(combined, count=offset + stop - start)[offset:].view(bool)
+
+class TimeIndex:
+    """
+    Frame kept sorted by timestamp, with O(log n) date-range lookups.
+    
+    The frame is sorted once (stably) if needed when the index is built; date
+    ranges are then selected as positional slices, which pandas returns without
+    scanning or copying the rows. Optionally a BitmapIndex over the sorted rows
+    answers dimension filters as well.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame with a 'timestamp' column
+    dimensions : iterable, optional
+        Dimension columns to build bitmaps for
+    """
+    
+    def __init__(self, df, dimensions=None):
+        if not df['timestamp'].is_monotonic_increasing:
+            df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+        self.df = df
+        self.timestamps = df['timestamp'].values
+        self.bitmaps = BitmapIndex(df, dimensions) if dimensions else None
+    
+    def __len__(self):
+        return len(self.df)
+    
+    def slice(self, start_date=None, end_date=None):
+        """Return the positional slice of the rows within a date range."""
+        return date_range_slice(self.timestamps, start_date, end_date)
+    
+    def select(self, start_date=None, end_date=None):
+        """Return the rows within a date range."""
+        return self.df.iloc[self.slice(start_date, end_date)]
+    
+    def date_bounds(self):
+        """Return the first and last day of the indexed data."""
+        return self.df['timestamp'].iloc[0].date(), self.df['timestamp'].iloc[-1].date()
@@ -0,0 +1,326 @@
+"""
+Aggregation kernels for the Brut Engagement Dashboard.
+Group-by sums, counts and means over integer group codes, computed with
+np.bincount instead of the generic pandas groupby machinery.
+"""
+
+import pandas as pd
+import numpy as np
+
+# Time series periods, finest first
+TIME_PERIODS = ['hour', 'day', 'week', 'month']
+
+def dimension_codes(values):
+    """
+    Return the integer codes and categories of a dimension column.
+    
+    Categorical columns reuse their codes; other columns are factorized with
+    sorted categories, the group order of pandas groupby. Missing values get code -1.
+    
+    Returns:
+    --------
+    tuple
+        (codes as int64 array, list of categories)
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.values.astype(np.int64), list(values.cat.categories)
+    codes, categories = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), list(categories)
+
+def day_ordinals(timestamps):
+    """
+    Return the day of every timestamp as an offset from the first day.
+    
+    Parameters:
+    -----------
+    timestamps : pandas.Series or numpy.ndarray
+        datetime64 values
+    
+    Returns:
+    --------
+    tuple
+        (int64 day offsets, first day as datetime64[D], number of days)
+    """
+    days = np.asarray(timestamps).astype('datetime64[D]')
+    if not len(days):
+        return np.zeros(0, dtype=np.int64), np.datetime64('today', 'D'), 0
+    first_day = days.min()
+    ordinals = (days - first_day).astype(np.int64)
+    return ordinals, first_day, int(ordinals.max()) + 1
+
+def day_axis(first_day, num_days):
+    """Every day of a day axis starting at first_day (datetime64[D]), as datetime.date objects."""
+    return [(first_day + offset).astype(object) for offset in range(num_days)]
+
+def day_slice(first_day, num_days, start_date=None, end_date=None):
+    """
+    Return the slice of a day axis covering a date range, clipped to the axis.
+    
+    Parameters:
+    -----------
+    first_day : numpy.datetime64
+        First day of the axis, as returned by day_ordinals
+    num_days : int
+        Number of days on the axis
+    start_date : datetime.date, optional
+        First day of the range (the start of the axis if None)
+    end_date : datetime.date, optional
+        Last day of the range (the end of the axis if None)
+    
+    Returns:
+    --------
+    slice
+        Positions on the axis of the days in the range (empty if none are)
+    """
+    def offset(day):
+        return int((np.datetime64(day, 'D') - first_day).astype(np.int64))
+    start = 0 if start_date is None else min(max(offset(start_date), 0), num_days)
+    stop = num_days if end_date is None else min(max(offset(end_date) + 1, start), num_days)
+    return slice(start, stop)
+
+def period_starts(timestamps, period='day'):
+    """
+    Return the start of the period of every timestamp.
+    
+    Parameters:
+    -----------
+    timestamps : numpy.ndarray
+        datetime64 values
+    period : str
+        One of TIME_PERIODS; weeks are ISO weeks, starting on Monday
+    
+    Returns:
+    --------
+    numpy.ndarray
+        datetime64[h] for hours, datetime64[D] for days and weeks, datetime64[M] for months
+    """
+    timestamps = np.asarray(timestamps)
+    if period == 'hour':
+        return timestamps.astype('datetime64[h]')
+    days = timestamps.astype('datetime64[D]')
+    if period == 'day':
+        return days
+    if period == 'week':
+        # Day 0 of datetime64, 1970-01-01, was a Thursday
+        return days - (days.astype(np.int64) + 3) % 7
+    if period == 'month':
+        return days.astype('datetime64[M]')
+    raise ValueError(f"Unknown time period '{period}'; expected one of {TIME_PERIODS}")
+
+def period_labels(starts, period='day'):
+    """Period starts as time series labels: datetime64[ns] for hours, datetime.date objects otherwise."""
+    if period == 'hour':
+        return starts.astype('datetime64[ns]')
+    return starts.astype('datetime64[D]').astype(object)
+
+def period_segments(timestamps, period='day'):
+    """
+    Find the contiguous run of rows of every period in sorted timestamps.
+    
+    Only the period edges are located, by binary search, so no per-row key is built.
+    
+    Parameters:
+    -----------
+    timestamps : numpy.ndarray
+        datetime64[ns] values sorted in increasing order
+    period : str
+        One of TIME_PERIODS
+    
+    Returns:
+    --------
+    tuple
+        (starts of the periods with rows, as returned by period_starts,
+        position of each period's first row)
+    """
+    if not len(timestamps):
+        return period_starts(np.array([], dtype='datetime64[ns]'), period), np.array([], dtype=np.intp)
+    first, last = period_starts(timestamps[[0, -1]], period)
+    edges = np.arange(first, last + 1, 7 if period == 'week' else 1)
+    starts = np.searchsorted(timestamps, edges.astype('datetime64[ns]'), side='left')
+    present = np.diff(np.append(starts, len(timestamps))) > 0
+    return edges[present], starts[present]
+
+def segment_sums(values, starts):
+    """Sum values over the contiguous segments beginning at starts (int64 for integer values)."""
+    values = np.asarray(values)
+    dtype = np.int64 if np.issubdtype(values.dtype, np.integer) else np.float64
+    return np.add.reduceat(values, starts, dtype=dtype) if len(starts) else np.zeros(0, dtype=dtype)
+
+def group_counts(codes, size):
+    """Number of rows per group code in range(size); negative codes are ignored."""
+    codes = np.asarray(codes)
+    return np.bincount(codes[codes >= 0] if (codes < 0).any() else codes, minlength=size)[:size]
+
+def group_sums(codes, values, size):
+    """
+    Sum values per group code in range(size); negative codes are ignored.
+    
+    Integer values are returned as int64 sums (exact below 2**53, as
+    np.bincount accumulates in float64), others as float64.
+    """
+    codes = np.asarray(codes)
+    values = np.asarray(values)
+    if (codes < 0).any():
+        keep = codes >= 0
+        codes, values = codes[keep], values[keep]
+    sums = np.bincount(codes, weights=values, minlength=size)[:size]
+    return sums.astype(np.int64) if np.issubdtype(values.dtype, np.integer) else sums
+
+def group_means(codes, values, size, counts=None):
+    """Mean of values per group code in range(size); NaN for empty groups."""
+    if counts is None:
+        counts = group_counts(codes, size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return group_sums(codes, values, size) / counts
+
+def aggregate_by_dimension(df, column, sums=(), means=()):
+    """
+    Aggregate a frame by a dimension column with bincount kernels.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame
+    column : str
+        Dimension column to group by
+    sums : iterable
+        Columns to sum per group
+    means : iterable
+        Columns to average per group
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per value present in the data, in category order (like
+        groupby(column, observed=True).agg(...).reset_index())
+    """
+    codes, categories = dimension_codes(df[column])
+    counts = group_counts(codes, len(categories))
+    present = np.flatnonzero(counts)
+    data = {column: pd.Categorical.from_codes(present, categories=categories)
+            if isinstance(df[column].dtype, pd.CategoricalDtype)
+            else np.array(categories, dtype=object)[present]}
+    for name in sums:
+        data[name] = group_sums(codes, df[name].values, len(categories))[present]
+    for name in means:
+        data[name] = group_means(codes, df[name].values, len(categories), counts)[present]
+    return pd.DataFrame(data)
+
+def top_k_indices(values, k, largest=True):
+    """
+    Return the positions of the k largest (or smallest) values, best first.
+    
+    The k values are found by partial selection (np.argpartition, linear in the
+    number of values) and only they are sorted, instead of sorting everything.
+    NaN values rank last.
+    
+    Parameters:
+    -----------
+    values : numpy.ndarray
+        Values to rank
+    k : int
+        Number of positions to return (fewer if there are fewer values)
+    largest : bool
+        Rank the largest values first; otherwise the smallest
+    
+    Returns:
+    --------
+    numpy.ndarray
+        Positions of the selected values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    keys = -values if largest else values
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    k = max(0, min(int(k), len(keys)))
+    if k < len(keys):
+        selected = np.argpartition(keys, k - 1)[:k] if k else np.zeros(0, dtype=np.intp)
+    else:
+        selected = np.arange(len(keys))
+    return selected[np.argsort(keys[selected], kind='stable')]
+
+def top_k_by_dimension(df, column, k, by, sums=(), means=(), largest=True):
+    """
+    Aggregate a frame by a dimension column and keep the k best values.
+    
+    Works on dimensions of any cardinality (e.g. post or creator ids): groups
+    are summed with np.bincount and ranked with top_k_indices, so the cost is
+    linear in the rows plus the distinct values, and only k rows are built.
+    
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Input data frame
+    column : str
+        Dimension column to group by
+    k : int
+        Number of values to keep
+    by : str
+        Column of sums or means to rank by
+    sums : iterable
+        Columns to sum per group
+    means : iterable
+        Columns to average per group
+    largest : bool
+        Keep the largest values of by; otherwise the smallest
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        Up to k rows, best first, with the columns of aggregate_by_dimension
+    """
+    if by not in sums and by not in means:
+        raise ValueError(f"Cannot rank by '{by}': it is neither summed nor averaged")
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, categories = values.cat.codes.values.astype(np.int64), values.cat.categories
+    else:
+        # No need to sort the distinct values: only the k selected ones are returned
+        codes, categories = pd.factorize(values, sort=False)
+        codes = codes.astype(np.int64)
+    size = len(categories)
+    counts = group_counts(codes, size)
+    present = np.flatnonzero(counts)
+    ranked = (group_means(codes, df[by].values, size, counts) if by in means
+              else group_sums(codes, df[by].values, size))[present]
+    selected = top_k_indices(ranked, k, largest)
+    groups = present[selected]
+    data = {column: pd.Categorical.from_codes(groups, categories=categories)
+            if isinstance(values.dtype, pd.CategoricalDtype)
+            else np.asarray(categories.take(groups), dtype=object)}
+    for name in sums:
+        data[name] = ranked[selected] if name == by else group_sums(codes, df[name].values, size)[groups]
+    for name in means:
+        data[name] = ranked[selected] if name == by else group_means(codes, df[name].values, size, counts)[groups]
+    return pd.DataFrame(data)
+
+def aggregate_by_period(df, period='day', sums=()):
+    """
+    Sum columns per hour, day, ISO week or month of the 'timestamp' column with bincount kernels.
+    
+    Sorted timestamps are summed as contiguous segments (see period_segments);
+    unsorted ones with np.bincount over period ordinals.
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        'date' (the period start, see period_labels) and one column per summed
+        column, for the periods with rows, in date order
+    """
+    timestamps = df['timestamp'].values
+    if df['timestamp'].is_monotonic_increasing:
+        starts, positions = period_segments(timestamps, period)
+        data = {'date': period_labels(starts, period)}
+        for name in sums:
+            data[name] = segment_sums(df[name].values, positions)
+        return pd.DataFrame(data)
+    
+    starts = period_starts(timestamps, period)
+    step = 7 if period == 'week' else 1
+    first = starts.min()
+    ordinals = (starts - first).astype(np.int64) // step
+    size = int(ordinals.max()) + 1
+    present = np.flatnonzero(group_counts(ordinals, size))
+    data = {'date': period_labels(first + present * step, period)}
+    for name in sums:
+        data[name] = group_sums(ordinals, df[name].values, size)[present]
+    return pd.DataFrame(data)
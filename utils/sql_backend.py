@@ -0,0 +1,185 @@
+"""
+Embedded SQL query backend for the Brut Engagement Dashboard.
+Runs the dashboard filters and aggregations in DuckDB directly against the dataset
+files, so only the small aggregated results are materialized in pandas.
+"""
+
+import os
+from datetime import timedelta
+import pandas as pd
+
+from data.data_loader import resolve_source
+from data.schema import DIMENSIONS, engagement_rate
+from data.storage import FORMATS, list_partitions, partition_date_bounds
+from .kernels import TIME_PERIODS
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - duckdb is optional
+    duckdb = None
+
+# Per-row engagement rate, rounded half-to-even like pandas' round(2)
+ENGAGEMENT_RATE_SQL = "ROUND_EVEN((likes + comments + shares) * 100.0 / views, 2)"
+
+def _metric_sums(columns):
+    """SELECT terms summing each metric column; DuckDB sums integers as HUGEINT, so cast back to BIGINT."""
+    return ", ".join(f"CAST(SUM({column}) AS BIGINT) AS {column}" for column in columns)
+
+def sql_available():
+    """Return True if duckdb is installed and SQLBackend can be used."""
+    return duckdb is not None
+
+class SQLBackend:
+    """
+    Filter and aggregate the dataset in an in-process DuckDB database.
+    
+    The dataset is scanned from disk on every query (CSV, Parquet, Arrow, or a
+    partitioned directory, of which only the partitions overlapping the date
+    range are opened). Filter arguments match utils.data_processing.filter_dataframe
+    and results match the pandas helpers of the same name.
+    
+    Parameters:
+    -----------
+    base_path : str
+        Dataset path without extension (see data.data_loader.dataset_paths)
+    """
+    
+    def __init__(self, base_path):
+        if duckdb is None:
+            raise ImportError("duckdb is required for the SQL backend: pip install duckdb")
+        self.base_path = base_path
+        self._connection = duckdb.connect()
+    
+    def _source(self, start_date=None, end_date=None):
+        """Return the FROM clause and its parameters for the dataset files."""
+        kind, path = resolve_source(self.base_path)
+        if kind == 'partitioned':
+            files = sorted(
+                os.path.join(directory, name)
+                for _, _, directory in list_partitions(path, start_date, end_date)
+                for name in os.listdir(directory)
+                if os.path.splitext(name)[1].lower() in FORMATS
+            )
+            if not files:
+                raise FileNotFoundError(f"No data files in {path} for the selected dates")
+            fmt = FORMATS[os.path.splitext(files[0])[1].lower()]
+        else:
+            files = path
+            fmt = FORMATS[os.path.splitext(path)[1].lower()]
+        
+        if fmt == 'csv':
+            return "read_csv(?, header = true)", [files]
+        if fmt == 'parquet':
+            return "read_parquet(?)", [files]
+        
+        # Arrow IPC files are scanned through a pyarrow dataset
+        import pyarrow.dataset as ds
+        return "arrow_source", [ds.dataset(files, format='ipc')]
+    
+    def _query(self, select, start_date=None, end_date=None, platforms=None, regions=None,
+               themes=None, suffix=''):
+        """Run SELECT <select> over the filtered dataset and return a DataFrame."""
+        source, params = self._source(start_date, end_date)
+        arrow_source = None
+        if source == 'arrow_source':
+            arrow_source, params = params[0], []
+        
+        conditions = []
+        if start_date is not None:
+            conditions.append("timestamp >= CAST(? AS TIMESTAMP)")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("timestamp < CAST(? AS TIMESTAMP)")
+            params.append(end_date + timedelta(days=1))
+        for column, values in zip(DIMENSIONS, (platforms, regions, themes)):
+            if values is not None and len(values) > 0:
+                conditions.append(f"{column} IN (SELECT UNNEST(?))")
+                params.append(list(values))
+        
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {select} FROM {source}{where} {suffix}"
+        # A cursor per query, so concurrent sessions can share one backend
+        cursor = self._connection.cursor()
+        try:
+            if arrow_source is not None:
+                cursor.register('arrow_source', arrow_source)
+            return cursor.execute(sql, params).df()
+        finally:
+            cursor.close()
+    
+    def date_bounds(self):
+        """
+        Return the first and last day of the dataset.
+        
+        Partitioned datasets answer from their directory names without reading rows.
+        """
+        kind, path = resolve_source(self.base_path)
+        if kind == 'partitioned':
+            return partition_date_bounds(path)
+        bounds = self._query("MIN(timestamp) AS first, MAX(timestamp) AS last")
+        return bounds['first'][0].date(), bounds['last'][0].date()
+    
+    def dimension_values(self, column, **filters):
+        """Return the distinct values of a dimension column, in order of first appearance."""
+        values = self._query(f"{column}, MIN(timestamp) AS first_seen", **filters,
+                             suffix=f"GROUP BY {column} ORDER BY first_seen")
+        return values[column].tolist()
+    
+    def calculate_kpis(self, **filters):
+        """
+        Calculate the dashboard KPIs in SQL.
+        
+        Returns:
+        --------
+        dict
+            Same keys as utils.data_processing.calculate_kpis
+        """
+        row = self._query(
+            f"CAST(SUM(views) AS BIGINT) AS total_views, AVG(likes) AS avg_likes, "
+            f"AVG({ENGAGEMENT_RATE_SQL}) AS avg_engagement, COUNT(*) AS total_posts",
+            **filters
+        ).iloc[0]
+        return {
+            'total_views': int(row['total_views']) if row['total_posts'] else 0,
+            'avg_likes': int(row['avg_likes']) if row['total_posts'] else 0,
+            'avg_engagement': row['avg_engagement'],
+            'total_posts': int(row['total_posts'])
+        }
+    
+    def get_platform_data(self, **filters):
+        """Aggregate by platform in SQL (see utils.data_processing.get_platform_data)."""
+        return self._query(
+            f"platform, {_metric_sums(['views', 'likes', 'comments', 'shares'])}, "
+            f"AVG({ENGAGEMENT_RATE_SQL}) AS engagement_rate",
+            **filters, suffix="GROUP BY platform ORDER BY platform"
+        )
+    
+    def get_theme_data(self, top_n=5, **filters):
+        """Aggregate by content theme in SQL and keep the top_n by engagement rate."""
+        return self._query(
+            f"content_theme, {_metric_sums(['views'])}, AVG({ENGAGEMENT_RATE_SQL}) AS engagement_rate",
+            **filters, suffix=f"GROUP BY content_theme ORDER BY engagement_rate DESC LIMIT {int(top_n)}"
+        )
+    
+    def get_time_series_data(self, period='day', **filters):
+        """Aggregate by hour, day, ISO week or month in SQL (see utils.data_processing.get_time_series_data)."""
+        if period not in TIME_PERIODS:
+            raise ValueError(f"Unknown time period '{period}'; expected one of {TIME_PERIODS}")
+        time_series = self._query(
+            f"DATE_TRUNC('{period}', timestamp) AS date, {_metric_sums(['views', 'likes', 'comments', 'shares'])}",
+            **filters, suffix="GROUP BY 1 ORDER BY 1"
+        )
+        dates = pd.to_datetime(time_series['date'])
+        time_series['date'] = dates.astype('datetime64[ns]') if period == 'hour' else dates.dt.date
+        time_series['engagement_rate'] = engagement_rate(time_series)
+        return time_series
+    
+    def prepare_display_data(self, n_rows=10, **filters):
+        """Return the n_rows most recent posts in SQL (see utils.data_processing.prepare_display_data)."""
+        display_df = self._query(
+            f"timestamp, platform, region, content_theme, views, likes, shares, comments, "
+            f"{ENGAGEMENT_RATE_SQL} AS engagement_rate",
+            **filters, suffix=f"ORDER BY timestamp DESC LIMIT {int(n_rows)}"
+        )
+        display_df['timestamp'] = display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
+        return display_df
@@ -0,0 +1,346 @@
+"""
+Incremental time series for the Brut Engagement Dashboard.
+Keeps per-day engagement sums that are updated in place as rows arrive,
+along with trailing rolling-window sums for the trend chart.
+"""
+
+import threading
+import pandas as pd
+import numpy as np
+
+from data.data_loader import frame_lineage
+from data.schema import engagement_rate
+from .cube import CUBE_DIMENSIONS, CUBE_METRICS
+from .kernels import (TIME_PERIODS, day_axis, day_slice, dimension_codes, group_counts, group_sums, period_labels,
+                      period_starts)
+
+# Trailing windows, in days, of the rolling engagement rates
+ROLLING_WINDOWS = [7, 28]
+
+# Fewest points the trend chart should show: it uses the coarsest period giving at least this many
+MIN_TREND_POINTS = 30
+
+# Longest date range, in days, shown by the hour. Hours are summed from the rows
+# rather than kept in the store, so they are only used for short ranges.
+HOURLY_MAX_DAYS = 3
+
+# Quantities summed per day and cell: the post count, then the metrics
+SERIES_FIELDS = ['posts'] + CUBE_METRICS
+
+def rolling_column(window):
+    """Name of the rolling engagement rate column of a window (e.g. 'engagement_rate_7d')."""
+    return f'engagement_rate_{window}d'
+
+def _engagement_rates(sums):
+    """Engagement rate (see data.schema.engagement_rate) of metric sums keyed by metric, NaN where there are no views."""
+    sums = pd.DataFrame({column: np.asarray(sums[column]) for column in CUBE_METRICS})
+    return engagement_rate(sums).where(sums['views'] > 0).values
+
+def period_count(start_date, end_date, period):
+    """Number of hours, days, ISO weeks or months a date range touches."""
+    first, last = period_starts(np.array([start_date, end_date], dtype='datetime64[D]'), period)
+    count = int((last - first).astype(np.int64))
+    if period == 'hour':
+        return count + 24
+    return count // 7 + 1 if period == 'week' else count + 1
+
+def select_period(start_date, end_date, min_points=MIN_TREND_POINTS, hourly_max_days=HOURLY_MAX_DAYS):
+    """
+    Pick the time series period for a date range.
+    
+    Returns the coarsest of days, weeks and months that still gives at least
+    min_points points over the range: days for a few months, weeks or months
+    for years. Shorter ranges use hours if they span at most hourly_max_days
+    days, and days otherwise, so an hourly chart has at most 24 * hourly_max_days
+    points.
+    """
+    for period in reversed(TIME_PERIODS[1:]):
+        if period_count(start_date, end_date, period) >= min_points:
+            return period
+    return 'hour' if period_count(start_date, end_date, 'day') <= hourly_max_days else 'day'
+
+def add_rolling_rates(time_series, windows=ROLLING_WINDOWS):
+    """
+    Add trailing rolling engagement rates to a daily time series.
+    
+    For series that are not kept in a TimeSeriesStore, such as the SQL
+    backend's. Days without rows count as empty, and the window cannot reach
+    before the first day of the series.
+    
+    Parameters:
+    -----------
+    time_series : pandas.DataFrame
+        Daily sums, as returned by utils.data_processing.get_time_series_data
+    windows : list
+        Window lengths in days
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        A new frame with one rolling_column per window
+    """
+    if time_series.empty:
+        return time_series.assign(**{rolling_column(window): np.array([], dtype=float) for window in windows})
+    days = pd.DatetimeIndex(pd.to_datetime(time_series['date']))
+    daily = time_series[CUBE_METRICS].set_axis(days).reindex(pd.date_range(days[0], days[-1]), fill_value=0)
+    return time_series.assign(**{
+        rolling_column(window): _engagement_rates(daily.rolling(window, min_periods=1).sum().loc[days])
+        for window in windows
+    })
+
+class TimeSeriesStore:
+    """
+    Per-day engagement sums maintained incrementally, with rolling windows.
+    
+    Sums are kept per day and per platform, region and content theme cell (as in
+    utils.cube.EngagementCube), so queries can apply the dashboard filters.
+    Appending rows updates only the days they fall on. The trailing sums of each
+    rolling window are kept for every day and updated the same way: a new day
+    costs one addition and one subtraction per cell, and rows added to an
+    existing day update the window days of that day only, so an append costs
+    the same however long the history is. The store is thread-safe.
+    
+    Parameters:
+    -----------
+    windows : list
+        Rolling window lengths in days
+    """
+    
+    def __init__(self, windows=ROLLING_WINDOWS):
+        self.windows = list(windows)
+        self._lock = threading.RLock()
+        self.clear()
+    
+    def clear(self):
+        """Drop every row folded in so far."""
+        self.first_day = None
+        self.num_days = 0
+        self.rows = 0
+        self.categories = None
+        self.version = None
+        self._lineage = None
+        self._sums = None
+        self._rolling = {}
+    
+    @property
+    def days(self):
+        """Every day of the store, as datetime.date objects."""
+        return day_axis(self.first_day, self.num_days)
+    
+    @property
+    def nbytes(self):
+        """Memory held by the store's arrays."""
+        if self._sums is None:
+            return 0
+        return self._sums.nbytes + sum(rolling.nbytes for rolling in self._rolling.values())
+    
+    def _cell_codes(self, df):
+        """
+        Flat platform/region/theme cell of every row, -1 for rows with a missing value.
+        
+        Returns None if df holds dimension values the store has no cell for.
+        """
+        if self.categories is None:
+            self.categories = {column: dimension_codes(df[column])[1] for column in CUBE_DIMENSIONS}
+        cells = np.zeros(len(df), dtype=np.int64)
+        valid = np.ones(len(df), dtype=bool)
+        for column in CUBE_DIMENSIONS:
+            categories = self.categories[column]
+            codes, values = dimension_codes(df[column])
+            # Map df's codes to the store's categories; the last entry keeps missing values (-1) at -1
+            positions = np.append(pd.Index(categories).get_indexer(values), -1)[codes]
+            if ((positions < 0) & (codes >= 0)).any():
+                return None
+            valid &= positions >= 0
+            cells = cells * len(categories) + positions
+        cells[~valid] = -1
+        return cells
+    
+    def _reserve(self, first_day, last_day):
+        """Extend the day axis to cover first_day..last_day, growing storage geometrically."""
+        cells = int(np.prod([len(self.categories[column]) for column in CUBE_DIMENSIONS]))
+        if self._sums is None:
+            self.first_day = first_day
+            self._sums = np.zeros((1, len(SERIES_FIELDS), cells), dtype=np.int64)
+            self._rolling = {window: np.zeros_like(self._sums) for window in self.windows}
+        
+        if first_day < self.first_day:
+            # Days before the first one hold no rows, so prepending them leaves the window sums valid
+            extra = int((self.first_day - first_day).astype(np.int64))
+            pad = np.zeros((extra,) + self._sums.shape[1:], dtype=np.int64)
+            self._sums = np.concatenate([pad, self._sums])
+            self._rolling = {window: np.concatenate([pad, rolling]) for window, rolling in self._rolling.items()}
+            self.first_day = first_day
+            self.num_days += extra
+        
+        num_days = max(self.num_days, int((last_day - self.first_day).astype(np.int64)) + 1)
+        if num_days > len(self._sums):
+            capacity = max(num_days, 2 * len(self._sums))
+            pad = np.zeros((capacity - len(self._sums),) + self._sums.shape[1:], dtype=np.int64)
+            self._sums = np.concatenate([self._sums, pad])
+            self._rolling = {window: np.concatenate([rolling, pad]) for window, rolling in self._rolling.items()}
+        
+        # New days hold no rows yet: slide each window forward one day at a time
+        for day in range(self.num_days, num_days):
+            for window, rolling in self._rolling.items():
+                if day > 0:
+                    rolling[day] = rolling[day - 1]
+                if day >= window:
+                    rolling[day] -= self._sums[day - window]
+        self.num_days = num_days
+    
+    def append(self, df):
+        """
+        Fold new rows into the daily sums and rolling windows.
+        
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            Rows with the timestamp, dimension and metric columns. They may fall
+            on any day, including days already in the store.
+        
+        Raises:
+        -------
+        ValueError
+            If df holds dimension values that were not in the rows folded in
+            first; sync rebuilds the store instead
+        """
+        if df.empty:
+            return
+        with self._lock:
+            cells = self._cell_codes(df)
+            if cells is None:
+                raise ValueError("New dimension values; rebuild the time series store")
+            self._fold(df, cells)
+    
+    def _fold(self, df, cells):
+        """Add rows with their flat cells to the daily sums and rolling windows."""
+        days = df['timestamp'].values.astype('datetime64[D]')
+        self._reserve(days.min(), days.max())
+        
+        # Sum the new rows per (day, cell) over the days they span only
+        ordinals = (days - self.first_day).astype(np.int64)
+        start, stop = int(ordinals.min()), int(ordinals.max()) + 1
+        num_cells = self._sums.shape[2]
+        keys = np.where(cells >= 0, (ordinals - start) * num_cells + cells, -1)
+        size = (stop - start) * num_cells
+        delta = np.stack(
+            [group_counts(keys, size)] + [group_sums(keys, df[column].values, size) for column in CUBE_METRICS],
+            axis=1
+        ).reshape(stop - start, num_cells, len(SERIES_FIELDS)).transpose(0, 2, 1)
+        
+        self._sums[start:stop] += delta
+        # A day's rows count towards the windows ending on it and on the window - 1 days after it
+        for window, rolling in self._rolling.items():
+            for shift in range(window):
+                if start + shift >= self.num_days:
+                    break
+                end = min(stop + shift, self.num_days)
+                rolling[start + shift:end] += delta[:end - start - shift]
+        
+        self.rows += len(df)
+    
+    def sync(self, df, version=None):
+        """
+        Bring the store up to date with the current version of a dataset.
+        
+        Only the rows after those folded in so far are added, and only when df
+        is known to extend the frame synced last: its lineage (see
+        data.data_loader.frame_lineage), set on incremental CSV loads, names
+        that frame as its parent. Any other change, such as rewritten rows or
+        dimension values the store has no cell for, rebuilds the store from df.
+        
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            The full data, e.g. as returned by data.DataLoader.load
+        version : hashable, optional
+            Version of df, e.g. data.DataLoader.fingerprint; syncing the version
+            synced last again returns at once
+        
+        Returns:
+        --------
+        int
+            Number of rows folded in
+        """
+        with self._lock:
+            lineage = frame_lineage(df)
+            if (version is not None and version == self.version) or (
+                    lineage is not None and lineage[0] == self._lineage):
+                self.version = version
+                return 0
+            
+            appended = (self.rows > 0 and lineage is not None
+                        and lineage[1] == self._lineage and lineage[2] == self.rows)
+            new_rows = df.iloc[self.rows:] if appended else df
+            cells = self._cell_codes(new_rows) if appended else None
+            if cells is None:
+                self.clear()
+                new_rows = df
+                cells = self._cell_codes(df)
+            if len(new_rows):
+                self._fold(new_rows, cells)
+            self.version = version
+            self._lineage = lineage[0] if lineage is not None else None
+            return len(new_rows)
+    
+    def _cell_mask(self, platforms, regions, themes):
+        """Flat boolean mask of the cells matching the dimension filters."""
+        mask = np.ones([len(self.categories[column]) for column in CUBE_DIMENSIONS], dtype=bool)
+        for axis, (column, selected) in enumerate(zip(CUBE_DIMENSIONS, (platforms, regions, themes))):
+            if selected is not None and len(selected) > 0:
+                wanted = np.isin(np.array(self.categories[column], dtype=object), list(selected))
+                shape = [1] * mask.ndim
+                shape[axis] = -1
+                mask &= wanted.reshape(shape)
+        return mask.ravel()
+    
+    def query(self, start_date=None, end_date=None, platforms=None, regions=None, themes=None, period='day'):
+        """
+        Return the time series and rolling engagement rates for dashboard filters.
+        
+        Takes the same filter arguments as utils.data_processing.filter_dataframe.
+        Rolling windows are trailing and include days before start_date.
+        
+        Parameters:
+        -----------
+        period : str
+            'day', or 'week' or 'month' to sum the days of each ISO week or month.
+            Hours are not kept; sum them from the rows with
+            utils.data_processing.get_time_series_data.
+        
+        Returns:
+        --------
+        pandas.DataFrame
+            The columns of utils.data_processing.get_time_series_data, for the
+            periods with matching rows, plus one rolling_column per window for days
+        """
+        if period not in TIME_PERIODS[1:]:
+            raise ValueError(f"TimeSeriesStore keeps days, weeks and months, not '{period}'")
+        with self._lock:
+            if self._sums is None:
+                return add_rolling_rates(pd.DataFrame({'date': [], **{column: [] for column in CUBE_METRICS},
+                                                       'engagement_rate': []}), self.windows)
+            days = day_slice(self.first_day, self.num_days, start_date, end_date)
+            cells = self._cell_mask(platforms, regions, themes)
+            sums = self._sums[days][:, :, cells].sum(axis=2)
+            rolling = {window: values[days][:, :, cells].sum(axis=2) for window, values in self._rolling.items()}
+            starts = self.first_day + np.arange(days.start, days.stop)
+        
+        if period != 'day':
+            # Weeks and months are runs of consecutive days, summed from the day buckets
+            starts = period_starts(starts, period)
+            bounds = np.flatnonzero(np.append(True, starts[1:] != starts[:-1])) if len(starts) else np.zeros(0, dtype=np.intp)
+            sums = np.add.reduceat(sums, bounds, axis=0) if len(bounds) else sums
+            starts = starts[bounds]
+            rolling = {}
+        
+        present = sums[:, 0] > 0
+        time_series = pd.DataFrame({'date': period_labels(starts[present], period)})
+        for column in CUBE_METRICS:
+            time_series[column] = sums[present, SERIES_FIELDS.index(column)]
+        time_series['engagement_rate'] = engagement_rate(time_series)
+        for window, values in rolling.items():
+            time_series[rolling_column(window)] = _engagement_rates(
+                {column: values[present, SERIES_FIELDS.index(column)] for column in CUBE_METRICS})
+        return time_series